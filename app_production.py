@@ -8,9 +8,22 @@ import os
 from pathlib import Path
 import json
 import logging
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from functools import partial
 import sys
 
+try:
+    from streaming_form_data import StreamingFormDataParser
+    from streaming_form_data.targets import FileTarget, ListTarget
+except ImportError:  # Fall back to Werkzeug's form parser
+    StreamingFormDataParser = None
+
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -31,12 +44,24 @@ app.secret_key = os.environ.get('SECRET_KEY', 'pwd-red-flag-analyzer-secret-key-
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
 app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), 'uploads')
 app.config['OUTPUT_FOLDER'] = os.path.join(os.path.dirname(__file__), 'outputs')
+app.config['JOB_FOLDER'] = os.path.join(os.path.dirname(__file__), 'jobs')
 
 ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
+UPLOAD_CHUNK_SIZE = 64 * 1024
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 2))  # Per gunicorn worker
+JOB_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+ANALYSIS_TIMEOUT = int(os.environ.get('ANALYSIS_TIMEOUT', 15 * 60))  # Seconds before a running job counts as failed
+JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 24 * 60 * 60))  # Seconds to keep job status files
+
+# Analysis is CPU-bound pandas work, so it runs as a background job in worker
+# processes; the pool is only started by the first upload
+_executor = None
+_executor_lock = threading.Lock()
 
 # Create necessary directories
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
+os.makedirs(app.config['JOB_FOLDER'], exist_ok=True)
 
 
 def allowed_file(filename):
@@ -45,6 +70,118 @@ def allowed_file(filename):
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def stream_upload(upload_path):
+    """
+    Stream a multipart upload straight to disk, bypassing Werkzeug's form parser
+    
+    Returns:
+        Tuple of (client filename or None if no file was sent, requested output formats)
+    """
+    parser = StreamingFormDataParser(headers=request.headers)
+    file_target = FileTarget(upload_path)
+    formats_target = ListTarget(str)
+    parser.register('file', file_target)
+    parser.register('formats', formats_target)
+    
+    while True:
+        chunk = request.stream.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        parser.data_received(chunk)
+    
+    return file_target.multipart_filename, formats_target.value
+
+
+def run_pipeline(filepath, output_formats, output_dir):
+    """Run the analysis pipeline in a worker process and clean up the upload"""
+    try:
+        pipeline = RedFlagPipeline(output_dir=output_dir)
+        result = pipeline.run(filepath, output_formats=output_formats)
+        return result, pipeline.get_summary()
+    finally:
+        try:
+            os.remove(filepath)
+        except:
+            pass
+
+
+def submit_analysis(*args):
+    """Submit a job to the analysis pool, replacing the pool if a worker died"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=ANALYSIS_WORKERS)
+        try:
+            return _executor.submit(*args)
+        except BrokenProcessPool:
+            _executor = ProcessPoolExecutor(max_workers=ANALYSIS_WORKERS)
+            return _executor.submit(*args)
+
+
+def job_status_path(job_id):
+    """Path of a job's status file, shared by all gunicorn workers"""
+    return os.path.join(app.config['JOB_FOLDER'], f"{job_id}.json")
+
+
+def write_job_status(job_id, status):
+    """Replace a job's status file atomically so /status never reads a partial one"""
+    path = job_status_path(job_id)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(status, f, default=str)
+    os.replace(tmp_path, path)
+
+
+def prune_job_statuses():
+    """Remove status files of jobs older than JOB_RETENTION"""
+    cutoff = time.time() - JOB_RETENTION
+    for entry in os.scandir(app.config['JOB_FOLDER']):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass  # Already removed by another gunicorn worker
+
+
+def record_job_result(job_id, future):
+    """Store the finished job's response for /status"""
+    try:
+        result, summary = future.result()
+    except Exception as e:
+        logger.error(f"Analysis job {job_id} failed: {str(e)}")
+        write_job_status(job_id, {
+            'status': 'failed',
+            'success': False,
+            'error': f'Server error: {str(e)}'
+        })
+        return
+    
+    if not result['success']:
+        write_job_status(job_id, {
+            'status': 'failed',
+            'success': False,
+            'error': f"Analysis failed: {result.get('error', 'Unknown error')}"
+        })
+        return
+    
+    # Prepare response with download links
+    output_files = {}
+    for fmt, file_path in result['output_files'].items():
+        output_filename = os.path.basename(file_path)
+        output_files[fmt] = {
+            'filename': output_filename,
+            'url': f'/download/{output_filename}'
+        }
+    
+    write_job_status(job_id, {
+        'status': 'done',
+        'success': True,
+        'summary': summary,
+        'output_files': output_files,
+        'data_quality': result.get('data_quality', {})
+    })
+
+
 @app.route('/')
 def index():
     """Home page"""
@@ -55,81 +192,67 @@ def index():
 def upload_file():
     """Handle file upload and analysis"""
     try:
-        # Check if file was uploaded
-        if 'file' not in request.files:
-            return jsonify({'success': False, 'error': 'No file uploaded'}), 400
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        stream_path = None
         
-        file = request.files['file']
+        if StreamingFormDataParser is not None and request.mimetype == 'multipart/form-data':
+            stream_path = os.path.join(
+                app.config['UPLOAD_FOLDER'], f"{timestamp}_{uuid.uuid4().hex}.upload"
+            )
+            original_filename, output_formats = stream_upload(stream_path)
+        else:
+            file = request.files.get('file')
+            original_filename = file.filename if file else None
+            output_formats = request.form.getlist('formats')
         
-        if file.filename == '':
-            return jsonify({'success': False, 'error': 'No file selected'}), 400
+        # Check if file was uploaded
+        error = None
+        if original_filename is None:
+            error = 'No file uploaded'
+        elif original_filename == '':
+            error = 'No file selected'
+        elif not allowed_file(original_filename):
+            error = 'Invalid file type. Please upload .xlsx or .xls file'
         
-        if not allowed_file(file.filename):
-            return jsonify({
-                'success': False, 
-                'error': 'Invalid file type. Please upload .xlsx or .xls file'
-            }), 400
+        if error:
+            if stream_path and os.path.exists(stream_path):
+                os.remove(stream_path)
+            return jsonify({'success': False, 'error': error}), 400
         
         # Save uploaded file
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = secure_filename(original_filename)
         unique_filename = f"{timestamp}_{filename}"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(filepath)
+        if stream_path:
+            os.replace(stream_path, filepath)
+        else:
+            file.save(filepath)
         
         logger.info(f"File uploaded: {filepath}")
         
         # Get output formats from request
-        output_formats = request.form.getlist('formats')
         if not output_formats:
             output_formats = ['excel', 'pdf']
         
-        # Run analysis pipeline
-        pipeline = RedFlagPipeline()
-        result = pipeline.run(filepath, output_formats=output_formats)
-        
-        # Clean up uploaded file
+        # Run analysis pipeline in the background, writing reports straight into
+        # the download folder; the client polls /status/<job_id> for the results
+        prune_job_statuses()
+        job_id = uuid.uuid4().hex
+        write_job_status(job_id, {'status': 'running', 'started': time.time()})
         try:
-            os.remove(filepath)
-        except:
-            pass
-        
-        if not result['success']:
-            return jsonify({
-                'success': False,
-                'error': f"Analysis failed: {result.get('error', 'Unknown error')}"
-            }), 500
-        
-        # Prepare response with download links
-        output_files = {}
-        for fmt, file_path in result['output_files'].items():
-            output_filename = os.path.basename(file_path)
-            output_path = os.path.join(app.config['OUTPUT_FOLDER'], output_filename)
-            
-            # Copy file to output folder
-            import shutil
-            shutil.copy2(file_path, output_path)
-            
-            # Clean up temp file
-            try:
-                os.remove(file_path)
-            except:
-                pass
-            
-            output_files[fmt] = {
-                'filename': output_filename,
-                'url': f'/download/{output_filename}'
-            }
-        
-        # Get summary
-        summary = pipeline.get_summary()
+            future = submit_analysis(
+                run_pipeline, filepath, output_formats, app.config['OUTPUT_FOLDER']
+            )
+        except Exception:
+            os.remove(job_status_path(job_id))
+            raise
+        future.add_done_callback(partial(record_job_result, job_id))
         
         return jsonify({
             'success': True,
-            'summary': summary,
-            'output_files': output_files,
-            'data_quality': result.get('data_quality', {})
-        })
+            'job_id': job_id,
+            'status_url': f'/status/{job_id}'
+        }), 202
         
     except Exception as e:
         logger.error(f"Error in upload: {str(e)}", exc_info=True)
@@ -139,6 +262,29 @@ def upload_file():
         }), 500
 
 
+@app.route('/status/<job_id>')
+def job_status(job_id):
+    """Report whether an analysis job is running, and its results once finished"""
+    if not JOB_ID_PATTERN.fullmatch(job_id):
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    try:
+        with open(job_status_path(job_id), encoding='utf-8') as f:
+            status = json.load(f)
+    except FileNotFoundError:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    # A worker that died mid-job never runs the done callback
+    if status['status'] == 'running' and time.time() - status.get('started', 0) > ANALYSIS_TIMEOUT:
+        return jsonify({
+            'status': 'failed',
+            'success': False,
+            'error': 'Analysis timed out. Please try again.'
+        })
+    
+    return jsonify(status)
+
+
 @app.route('/download/<filename>')
 def download_file(filename):
     """Download generated report"""
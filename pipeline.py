@@ -28,10 +28,14 @@ class RedFlagPipeline:
     Main pipeline for red flag analysis
     """
     
-    def __init__(self):
+    def __init__(self, output_dir: Optional[str] = None):
+        """
+        Args:
+            output_dir: Directory for generated reports (default: ReportGenerator's)
+        """
         self.reader = ExcelReader()
         self.analyzer = RedFlagAnalyzer()
-        self.report_gen = ReportGenerator()
+        self.report_gen = ReportGenerator(output_dir)
         self.df = None
         self.results = None
         
@@ -111,12 +115,10 @@ class RedFlagPipeline:
             
             # Step 4: Generate reports
             logger.info("Step 4: Generating reports...")
-            output_files = {}
+            logger.info(f"  Generating {', '.join(fmt.upper() for fmt in output_formats)} reports...")
+            output_files = self.report_gen.generate_reports(self.results, output_formats)
             
-            for fmt in output_formats:
-                logger.info(f"  Generating {fmt.upper()} report...")
-                output_file = self.report_gen.generate_report(self.results, fmt)
-                output_files[fmt] = output_file
+            for fmt, output_file in output_files.items():
                 logger.info(f"  ✓ {fmt.upper()} report saved: {output_file}")
             
             # Step 5: Summary
@@ -70,18 +70,29 @@ class ExcelReader:
         logger.info(f"Reading Excel file: {file_path}")
         
         try:
-            # Try reading with openpyxl (better Unicode support)
-            wb = load_workbook(file_path, read_only=False, data_only=True)
+            # Try reading with openpyxl (better Unicode support); read-only mode
+            # streams rows from the sheet XML instead of building every cell object
+            wb = load_workbook(file_path, read_only=True, data_only=True)
             
-            if sheet_name:
-                ws = wb[sheet_name]
-            else:
-                ws = wb.active
+            try:
+                if sheet_name:
+                    ws = wb[sheet_name]
+                else:
+                    ws = wb.active
+                
+                # Read-only mode trusts the sheet's stored <dimension>, which some
+                # tools write stale (e.g. "A1"); discard it so no rows are dropped
+                ws.reset_dimensions()
+                
+                # Read all data
+                data = [list(row) for row in ws.iter_rows(values_only=True)]
+            finally:
+                wb.close()
             
-            # Read all data
-            data = []
-            for row in ws.iter_rows(values_only=True):
-                data.append(list(row))
+            # Without a dimension each row ends at its last stored cell
+            width = max((len(row) for row in data), default=0)
+            for row in data:
+                row.extend([None] * (width - len(row)))
             
             # Convert to DataFrame
             if len(data) > 0:
@@ -114,12 +114,10 @@ class RedFlagPipeline:
             
             # Step 4: Generate reports
             logger.info("Step 4: Generating reports...")
-            output_files = {}
+            logger.info(f"  Generating {', '.join(fmt.upper() for fmt in output_formats)} reports...")
+            output_files = self.report_gen.generate_reports(self.results, output_formats)
             
-            for fmt in output_formats:
-                logger.info(f"  Generating {fmt.upper()} report...")
-                output_file = self.report_gen.generate_report(self.results, fmt)
-                output_files[fmt] = output_file
+            for fmt, output_file in output_files.items():
                 logger.info(f"  ✓ {fmt.upper()} report saved: {output_file}")
             
             # Step 5: Summary
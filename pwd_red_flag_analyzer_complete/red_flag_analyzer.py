@@ -3,8 +3,10 @@ Red Flag Analyzer for PWD Works
 Implements 8 red flag detection criteria based on audit parameters
 """
 
+import numpy as np
 import pandas as pd
 import re
+from collections import Counter
 from datetime import datetime
 from typing import Dict, List, Tuple, Any
 import logging
@@ -19,10 +21,20 @@ class RedFlagAnalyzer:
     Analyzes PWD works data against 8 red flag criteria
     """
     
+    # Road number patterns in order of precedence (hyphen and whitespace optional)
+    ROAD_NUMBER_PATTERNS = [
+        ('SH', re.compile(r'SH-?\s*(\d+)', re.IGNORECASE)),
+        ('MDR', re.compile(r'MDR-?\s*(\d+)', re.IGNORECASE)),
+        ('NH', re.compile(r'NH-?\s*(\d+)', re.IGNORECASE))
+    ]
+    
     def __init__(self):
         self.red_flags = []
         self.green_flags = []
         self.current_date = datetime.now()
+        self._now = pd.Timestamp(self.current_date)  # Subtracted from datetime64 columns without conversion
+        self._prepared_source = None  # Sheet the cached typed frame was built from
+        self._prepared = None
         
     def analyze_all_flags(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
@@ -44,24 +56,55 @@ class RedFlagAnalyzer:
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
         
-        for idx, row in df.iterrows():
-            record_flags = self._analyze_single_record(row, idx)
-            
-            if record_flags:
-                results['red_flagged'].append({
-                    'record_index': idx + 2,  # +2 because Excel is 1-indexed and has header
-                    'sr_no': row.get('Sr.', idx),
-                    'budget_item_no': row.get('Budget Item No.', 'N/A'),
-                    'name_of_work': row.get('Name of the work', 'N/A'),
-                    'flags': record_flags
-                })
-            else:
-                results['green_flagged'].append({
-                    'record_index': idx + 2,
-                    'sr_no': row.get('Sr.', idx),
-                    'budget_item_no': row.get('Budget Item No.', 'N/A'),
-                    'name_of_work': row.get('Name of the work', 'N/A')
-                })
+        prepared = self._prepared_frame(df)
+        row_flags = self._vectorized_row_flags(prepared)
+        excess_mask = row_flags['excess_mask']
+        delay_mask = row_flags['delay_mask']
+        flagged = excess_mask | delay_mask
+        
+        records = pd.DataFrame({
+            'sr_no': df['Sr.'] if 'Sr.' in df.columns else df.index.to_series(),
+            'budget_item_no': df.get('Budget Item No.', 'N/A'),
+            'name_of_work': df.get('Name of the work', 'N/A')
+        }, index=df.index)
+        
+        # Build each flag's result only for the rows that raised it
+        excess_columns = ['aa_cost', 'total_exp', 'excess_percentage']
+        excess_flags = {
+            idx: self._excess_expenditure_flag(aa_cost, total_exp, excess_percentage)
+            for idx, aa_cost, total_exp, excess_percentage
+            in row_flags.loc[excess_mask, excess_columns].itertuples(index=True, name=None)
+        }
+        delay_columns = ['wo_date', 'limit_days', 'expected_completion', 'delay_days', 'progress']
+        delay_flags = {
+            idx: self._delay_flag(wo_date, int(limit_days), expected_completion,
+                                  int(delay_days), progress)
+            for idx, wo_date, limit_days, expected_completion, delay_days, progress
+            in row_flags.loc[delay_mask, delay_columns].itertuples(index=True, name=None)
+        }
+        
+        results['red_flagged'] = [
+            {
+                'record_index': idx + 2,  # +2 because Excel is 1-indexed and has header
+                'sr_no': sr_no,
+                'budget_item_no': budget_item_no,
+                'name_of_work': name_of_work,
+                'flags': [flag for flag in (excess_flags.get(idx), delay_flags.get(idx)) if flag]
+            }
+            for idx, sr_no, budget_item_no, name_of_work
+            in records.loc[flagged].itertuples(index=True, name=None)
+        ]
+        
+        results['green_flagged'] = [
+            {
+                'record_index': idx + 2,
+                'sr_no': sr_no,
+                'budget_item_no': budget_item_no,
+                'name_of_work': name_of_work
+            }
+            for idx, sr_no, budget_item_no, name_of_work
+            in records.loc[~flagged].itertuples(index=True, name=None)
+        ]
         
         # Calculate summary statistics
         results['flag_summary'] = self._calculate_summary(results['red_flagged'])
@@ -70,114 +113,150 @@ class RedFlagAnalyzer:
         
         return results
     
-    def _analyze_single_record(self, row: pd.Series, idx: int) -> List[Dict[str, Any]]:
-        """Analyze a single record against all criteria"""
-        flags = []
+    def _prepared_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Typed frame for df, built once and shared by analyze_all_flags and
+        analyze_batch_flags when both are called on the same DataFrame
         
-        # Flag 1: Diversion of funds (requires Remark field - not in current schema)
-        # Skip for now as requires additional data
+        The cache is keyed on the DataFrame object, so a sheet edited in place
+        between the two calls must be passed as a new DataFrame.
+        """
+        if self._prepared_source is not df:
+            self._prepared = self._prepare(df)
+            self._prepared_source = df
+        return self._prepared
+    
+    def _prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Parse the columns used by the flag checks once
         
-        # Flag 2: Wasteful expenditure on survey works
-        flag2 = self._check_survey_wastage(row)
-        if flag2:
-            flags.append(flag2)
+        Costs, chainages and progress stay float64 because their values are
+        echoed into flag descriptions and reports; whole-day and year columns
+        use compact integer dtypes.
         
-        # Flag 3: Excess expenditure without approval (>10% of AA)
-        flag3 = self._check_excess_expenditure(row)
-        if flag3:
-            flags.append(flag3)
+        Returns:
+            DataFrame aligned with df holding only the typed, underscore-prefixed
+            columns, so the raw sheet is never copied
+        """
+        wo_date = self._date_column(df, 'Date of Work_Order')
+        # Time limits beyond the pd.Timedelta range can never be checked and would
+        # wrap in int32, so they are skipped with a warning and stored as 0 like
+        # missing values
+        limit_days = np.trunc(self._numeric_column(df, 'Original Time Limit in Days'))
+        limit_out_of_range = limit_days.abs().gt(pd.Timedelta.max.days)
+        if limit_out_of_range.any():
+            logger.warning(f"Error checking delay: time limit out of range for {int(limit_out_of_range.sum())} record(s)")
+            limit_days = limit_days.mask(limit_out_of_range, 0)
+        if 'Name of the work' in df.columns:
+            name_upper = df['Name of the work'].astype(str).str.upper()
+        else:
+            name_upper = pd.Series('', index=df.index)
         
-        # Flag 4: Overlapping of work (requires comparison with other records)
-        # Will be handled in batch analysis
+        return pd.DataFrame({
+            '_aa_cost': self._numeric_column(df, 'Administrative Approval Cost (Lakh)'),
+            '_total_exp': self._numeric_column(df, 'Total Expenditure (Lakhs)'),
+            '_cost': self._numeric_column(df, 'Contract Agreement Cost (Lakh)'),
+            '_from': self._numeric_column(df, 'Chainage From'),
+            '_to': self._numeric_column(df, 'Chainage To'),
+            '_limit_days': limit_days.astype('int32'),
+            '_progress': self._numeric_column(df, 'Physical Progress'),
+            '_wo_date': wo_date,
+            '_wo_year': wo_date.dt.year.astype('Int16'),
+            '_name_upper': name_upper,
+            '_road_num': self._road_number_column(name_upper),
+            '_road_cat': df.get('Road Category'),
+            '_budget_item': df.get('Budget Item No.', 'N/A')
+        }, index=df.index)
+    
+    def _vectorized_row_flags(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Evaluate the per-record flags (Flag 3 and Flag 5) for all rows at once
         
-        # Flag 5: Delay in completion of work
-        flag5 = self._check_delay_in_completion(row)
-        if flag5:
-            flags.append(flag5)
+        Args:
+            df: DataFrame annotated by _prepare
+            
+        Returns:
+            DataFrame aligned with df holding the boolean flag masks and the
+            precomputed values needed to describe each flag
+        """
+        aa_cost = df['_aa_cost']
+        total_exp = df['_total_exp']
+        limit_days = df['_limit_days']
+        progress = df['_progress']
+        wo_date = df['_wo_date']
         
-        # Flag 6: Splitting of work (requires comparison with other records)
-        # Will be handled in batch analysis
+        # Flags 1, 2, 7 and 8 need Remark / deposit work data not in the current schema.
+        # Flags 4 and 6 compare records with each other, see analyze_batch_flags.
         
-        # Flag 7: Non-recovery of centage charges (requires additional deposit work data)
-        # Skip for now as requires additional data
+        # Rows missing the mandatory fields of a flag are excluded before any arithmetic
+        excess_candidates = aa_cost.gt(0)
+        delay_candidates = wo_date.notna() & limit_days.gt(0) & progress.lt(100)
         
-        # Flag 8: Unspent balance not returned (requires additional deposit work data)
-        # Skip for now as requires additional data
+        # Completion dates beyond pd.Timestamp.max cannot be represented; skip those
+        # records with a warning (_prepare already zeroed out-of-range time limits)
+        wo_days = (wo_date - pd.Timestamp(0)).dt.days
+        out_of_range = delay_candidates & (wo_days + limit_days).ge(pd.Timedelta.max.days)
+        if out_of_range.any():
+            logger.warning(f"Error checking delay: expected completion date out of range for {int(out_of_range.sum())} record(s)")
+            delay_candidates &= ~out_of_range
         
-        return flags
-    
-    def _check_survey_wastage(self, row: pd.Series) -> Dict[str, Any]:
-        """
-        Flag 2: Check for wasteful expenditure on survey works
-        If remark includes survey works but other items have nil payment
-        """
-        # This requires additional data fields not in current schema
-        # Placeholder for when data is available
-        return None
-    
-    def _check_excess_expenditure(self, row: pd.Series) -> Dict[str, Any]:
-        """
-        Flag 3: Check if expenditure exceeds AA by more than 10%
-        """
-        try:
-            aa_cost = self._safe_float(row.get('Administrative Approval Cost (Lakh)', 0))
-            total_exp = self._safe_float(row.get('Total Expenditure (Lakhs)', 0))
-            
-            if aa_cost > 0:
-                excess_percentage = ((total_exp - aa_cost) / aa_cost) * 100
-                
-                if excess_percentage > 10:
-                    return {
-                        'flag_id': 3,
-                        'flag_name': 'Excess Expenditure Without Approval',
-                        'severity': 'HIGH',
-                        'description': f'Expenditure exceeds Administrative Approval by {excess_percentage:.2f}%',
-                        'details': {
-                            'aa_cost_lakh': aa_cost,
-                            'total_expenditure_lakh': total_exp,
-                            'excess_amount_lakh': total_exp - aa_cost,
-                            'excess_percentage': round(excess_percentage, 2)
-                        }
-                    }
-        except Exception as e:
-            logger.warning(f"Error checking excess expenditure: {e}")
+        # Flag 3: expenditure exceeds AA by more than 10%
+        excess_percentage = ((total_exp - aa_cost) / aa_cost.where(excess_candidates)) * 100
+        excess_mask = excess_candidates & excess_percentage.gt(10)
         
-        return None
-    
-    def _check_delay_in_completion(self, row: pd.Series) -> Dict[str, Any]:
-        """
-        Flag 5: Check if work is delayed beyond stipulated period
-        """
-        try:
-            work_order_date = self._parse_date(row.get('Date of Work_Order'))
-            time_limit_days = self._safe_int(row.get('Original Time Limit in Days', 0))
-            physical_progress = self._safe_float(row.get('Physical Progress', 0))
-            
-            if work_order_date and time_limit_days > 0:
-                expected_completion = work_order_date + pd.Timedelta(days=time_limit_days)
-                
-                # Check if work is delayed and not 100% complete
-                if self.current_date > expected_completion and physical_progress < 100:
-                    delay_days = (self.current_date - expected_completion).days
-                    
-                    return {
-                        'flag_id': 5,
-                        'flag_name': 'Delay in Completion of Work',
-                        'severity': 'MEDIUM',
-                        'description': f'Work delayed by {delay_days} days, physical progress: {physical_progress}%',
-                        'details': {
-                            'work_order_date': work_order_date.strftime('%Y-%m-%d'),
-                            'time_limit_days': time_limit_days,
-                            'expected_completion': expected_completion.strftime('%Y-%m-%d'),
-                            'current_date': self.current_date.strftime('%Y-%m-%d'),
-                            'delay_days': delay_days,
-                            'physical_progress_percent': physical_progress
-                        }
-                    }
-        except Exception as e:
-            logger.warning(f"Error checking delay: {e}")
+        # Flag 5: work not 100% complete past its stipulated completion date
+        expected_completion = wo_date.where(delay_candidates) + pd.to_timedelta(limit_days.where(delay_candidates), unit='D')
+        overdue = self._now - expected_completion
+        delay_days = overdue.dt.days
+        delay_mask = delay_candidates & overdue.gt(pd.Timedelta(0))
         
-        return None
+        return pd.DataFrame({
+            'excess_mask': excess_mask,
+            'delay_mask': delay_mask,
+            'aa_cost': aa_cost,
+            'total_exp': total_exp,
+            'excess_percentage': excess_percentage,
+            'wo_date': wo_date,
+            'limit_days': limit_days,
+            'progress': progress,
+            'expected_completion': expected_completion,
+            'delay_days': delay_days
+        }, index=df.index)
+    
+    def _excess_expenditure_flag(self, aa_cost: float, total_exp: float,
+                                 excess_percentage: float) -> Dict[str, Any]:
+        """Build the Flag 3 result for a record"""
+        return {
+            'flag_id': 3,
+            'flag_name': 'Excess Expenditure Without Approval',
+            'severity': 'HIGH',
+            'description': f'Expenditure exceeds Administrative Approval by {excess_percentage:.2f}%',
+            'details': {
+                'aa_cost_lakh': aa_cost,
+                'total_expenditure_lakh': total_exp,
+                'excess_amount_lakh': total_exp - aa_cost,
+                'excess_percentage': round(excess_percentage, 2)
+            }
+        }
+    
+    def _delay_flag(self, work_order_date: pd.Timestamp, time_limit_days: int,
+                    expected_completion: pd.Timestamp, delay_days: int,
+                    physical_progress: float) -> Dict[str, Any]:
+        """Build the Flag 5 result for a record"""
+        return {
+            'flag_id': 5,
+            'flag_name': 'Delay in Completion of Work',
+            'severity': 'MEDIUM',
+            'description': f'Work delayed by {delay_days} days, physical progress: {physical_progress}%',
+            'details': {
+                'work_order_date': work_order_date.strftime('%Y-%m-%d'),
+                'time_limit_days': time_limit_days,
+                'expected_completion': expected_completion.strftime('%Y-%m-%d'),
+                'current_date': self.current_date.strftime('%Y-%m-%d'),
+                'delay_days': delay_days,
+                'physical_progress_percent': physical_progress
+            }
+        }
     
     def analyze_batch_flags(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """
@@ -186,12 +265,13 @@ class RedFlagAnalyzer:
         Flag 6: Splitting of work
         """
         batch_flags = []
+        prepared = self._prepared_frame(df)
         
         # Flag 4: Check for overlapping works
-        batch_flags.extend(self._check_overlapping_works(df))
+        batch_flags.extend(self._check_overlapping_works(prepared))
         
         # Flag 6: Check for splitting of works
-        batch_flags.extend(self._check_splitting_of_works(df))
+        batch_flags.extend(self._check_splitting_of_works(prepared))
         
         return batch_flags
     
@@ -201,59 +281,66 @@ class RedFlagAnalyzer:
         """
         overlapping_flags = []
         
-        # Group by road category and check for chainage overlaps
-        for road_cat in df['Road Category'].dropna().unique():
-            if pd.isna(road_cat):
+        works = pd.DataFrame({
+            'road_cat_rank': pd.factorize(df['_road_cat'])[0],
+            'road_num': df['_road_num'],
+            'from': df['_from'],
+            'to': df['_to'],
+            'position': np.arange(len(df))
+        }, index=df.index)
+        
+        # Works without a road category, road number or chainage cannot overlap
+        works = works[
+            (works['road_cat_rank'] >= 0)
+            & works['road_num'].notna()
+            & ~((works['from'] == 0) & (works['to'] == 0))
+        ]
+        
+        # Find overlapping pairs among works on the same road, one vectorized step per group
+        pair_ranks, pair_first, pair_second = [], [], []
+        for (road_cat_rank, _), group in works.groupby(['road_cat_rank', 'road_num'], sort=False):
+            if len(group) < 2:
                 continue
-                
-            road_works = df[df['Road Category'] == road_cat].copy()
-            
-            # Extract road number (SH, MDR, NH, etc.)
-            for idx1, row1 in road_works.iterrows():
-                name1 = str(row1.get('Name of the work', '')).upper()
-                from1 = self._safe_float(row1.get('Chainage From', 0))
-                to1 = self._safe_float(row1.get('Chainage To', 0))
-                
-                if from1 == 0 and to1 == 0:
-                    continue
-                
-                # Check against other works
-                for idx2, row2 in road_works.iterrows():
-                    if idx1 >= idx2:  # Avoid duplicate comparisons
-                        continue
-                    
-                    name2 = str(row2.get('Name of the work', '')).upper()
-                    from2 = self._safe_float(row2.get('Chainage From', 0))
-                    to2 = self._safe_float(row2.get('Chainage To', 0))
-                    
-                    if from2 == 0 and to2 == 0:
-                        continue
-                    
-                    # Check if chainages overlap
-                    if self._chainages_overlap(from1, to1, from2, to2):
-                        # Check if road numbers match
-                        road_num1 = self._extract_road_number(name1)
-                        road_num2 = self._extract_road_number(name2)
-                        
-                        if road_num1 and road_num2 and road_num1 == road_num2:
-                            overlapping_flags.append({
-                                'flag_id': 4,
-                                'flag_name': 'Overlapping of Work',
-                                'severity': 'HIGH',
-                                'description': f'Works overlap on {road_num1}',
-                                'affected_records': [
-                                    {
-                                        'record_index': idx1 + 2,
-                                        'budget_item_no': row1.get('Budget Item No.', 'N/A'),
-                                        'chainage': f"{from1} to {to1}"
-                                    },
-                                    {
-                                        'record_index': idx2 + 2,
-                                        'budget_item_no': row2.get('Budget Item No.', 'N/A'),
-                                        'chainage': f"{from2} to {to2}"
-                                    }
-                                ]
-                            })
+            first, second = self._overlapping_pairs(group['from'].to_numpy(), group['to'].to_numpy())
+            positions = group['position'].to_numpy()
+            pair_ranks.append(np.full(len(first), road_cat_rank))
+            pair_first.append(positions[first])
+            pair_second.append(positions[second])
+        
+        if not pair_ranks:
+            return overlapping_flags
+        
+        # Report pairs grouped by road category, then in record order
+        pair_ranks = np.concatenate(pair_ranks)
+        pair_first = np.concatenate(pair_first)
+        pair_second = np.concatenate(pair_second)
+        order = np.lexsort((pair_second, pair_first, pair_ranks))
+        
+        record_indexes = df.index.tolist()
+        budget_items = df['_budget_item'].tolist()
+        road_nums = works['road_num'].reindex(df.index).tolist()
+        chain_from = works['from'].reindex(df.index).tolist()
+        chain_to = works['to'].reindex(df.index).tolist()
+        
+        for pos1, pos2 in zip(pair_first[order].tolist(), pair_second[order].tolist()):
+            overlapping_flags.append({
+                'flag_id': 4,
+                'flag_name': 'Overlapping of Work',
+                'severity': 'HIGH',
+                'description': f'Works overlap on {road_nums[pos1]}',
+                'affected_records': [
+                    {
+                        'record_index': record_indexes[pos1] + 2,
+                        'budget_item_no': budget_items[pos1],
+                        'chainage': f"{chain_from[pos1]} to {chain_to[pos1]}"
+                    },
+                    {
+                        'record_index': record_indexes[pos2] + 2,
+                        'budget_item_no': budget_items[pos2],
+                        'chainage': f"{chain_from[pos2]} to {chain_to[pos2]}"
+                    }
+                ]
+            })
         
         return overlapping_flags
     
@@ -267,136 +354,138 @@ class RedFlagAnalyzer:
         # This requires Agreement Register data with contractor information
         # For now, we'll check based on available data: same road, similar chainage, cost < 10 lakh
         
-        # Group by year (from work order date)
-        df_copy = df.copy()
-        df_copy['year'] = pd.to_datetime(df_copy['Date of Work_Order'], errors='coerce').dt.year
+        works = pd.DataFrame({
+            'year': df['_wo_year'],
+            'road_cat': df['_road_cat'],
+            'road_num': df['_road_num'],
+            'contract_cost': df['_cost'],
+            'from': df['_from'],
+            'to': df['_to'],
+            'position': np.arange(len(df))
+        }, index=df.index)
+        
+        # Flags are reported by year, then road category, in order of first appearance
+        works['year_first'] = works.groupby('year')['position'].transform('min')
+        works['road_cat_first'] = works.groupby(['year', 'road_cat'])['position'].transform('min')
+        
+        group_keys = ['year', 'road_cat', 'road_num']
+        small_works = works[
+            (works['contract_cost'] > 0)
+            & (works['contract_cost'] < 10)
+            & works['road_num'].notna()
+        ]
+        
+        # Check for suspicious patterns (3+ works on same road, each < 10 lakh)
+        group_sizes = small_works.groupby(group_keys, sort=False)['position'].transform('size')
+        small_works = small_works[group_sizes >= 3]
+        
+        record_indexes = df.index.tolist()
+        budget_items = df['_budget_item'].tolist()
         
-        for year in df_copy['year'].dropna().unique():
-            year_works = df_copy[df_copy['year'] == year]
+        found = []
+        for (year, _, road_num), works_group in small_works.groupby(group_keys, sort=False):
+            works_sorted = works_group.sort_values('from', kind='stable')
             
-            # Group by road category
-            for road_cat in year_works['Road Category'].dropna().unique():
-                road_works = year_works[year_works['Road Category'] == road_cat]
-                
-                # Find groups of works with similar road numbers and continuous chainage
-                road_groups = {}
-                
-                for idx, row in road_works.iterrows():
-                    name = str(row.get('Name of the work', '')).upper()
-                    road_num = self._extract_road_number(name)
-                    contract_cost = self._safe_float(row.get('Contract Agreement Cost (Lakh)', 0))
-                    
-                    if road_num and contract_cost > 0 and contract_cost < 10:
-                        if road_num not in road_groups:
-                            road_groups[road_num] = []
-                        
-                        road_groups[road_num].append({
-                            'index': idx,
-                            'row': row,
-                            'contract_cost': contract_cost,
-                            'from': self._safe_float(row.get('Chainage From', 0)),
-                            'to': self._safe_float(row.get('Chainage To', 0))
-                        })
-                
-                # Check for suspicious patterns (3+ works on same road, each < 10 lakh)
-                for road_num, works in road_groups.items():
-                    if len(works) >= 3:
-                        # Check if chainages are continuous or overlapping
-                        works_sorted = sorted(works, key=lambda x: x['from'])
-                        
-                        # If works are in continuation, flag for splitting
-                        continuous = True
-                        for i in range(len(works_sorted) - 1):
-                            gap = works_sorted[i+1]['from'] - works_sorted[i]['to']
-                            if gap > 5:  # More than 5 km gap
-                                continuous = False
-                                break
-                        
-                        if continuous:
-                            splitting_flags.append({
-                                'flag_id': 6,
-                                'flag_name': 'Splitting of Work',
-                                'severity': 'HIGH',
-                                'description': f'Potential work splitting detected on {road_num} in year {int(year)}',
-                                'affected_records': [
-                                    {
-                                        'record_index': w['index'] + 2,
-                                        'budget_item_no': w['row'].get('Budget Item No.', 'N/A'),
-                                        'contract_cost_lakh': w['contract_cost'],
-                                        'chainage': f"{w['from']} to {w['to']}"
-                                    }
-                                    for w in works_sorted
-                                ],
-                                'total_cost': sum(w['contract_cost'] for w in works_sorted)
-                            })
+            # If works are in continuation (no more than 5 km gap), flag for splitting
+            gaps = works_sorted['from'].shift(-1) - works_sorted['to']
+            if (gaps.iloc[:-1] > 5).any():
+                continue
+            
+            costs = works_sorted['contract_cost'].tolist()
+            order_key = (works_group['year_first'].iloc[0],
+                         works_group['road_cat_first'].iloc[0],
+                         works_group['position'].min())
+            found.append((order_key, {
+                'flag_id': 6,
+                'flag_name': 'Splitting of Work',
+                'severity': 'HIGH',
+                'description': f'Potential work splitting detected on {road_num} in year {int(year)}',
+                'affected_records': [
+                    {
+                        'record_index': record_indexes[pos] + 2,
+                        'budget_item_no': budget_items[pos],
+                        'contract_cost_lakh': cost,
+                        'chainage': f"{chain_from} to {chain_to}"
+                    }
+                    for pos, cost, chain_from, chain_to in zip(
+                        works_sorted['position'].tolist(), costs,
+                        works_sorted['from'].tolist(), works_sorted['to'].tolist()
+                    )
+                ],
+                'total_cost': sum(costs)
+            }))
+        
+        found.sort(key=lambda item: item[0])
+        splitting_flags.extend(flag for _, flag in found)
         
         return splitting_flags
     
-    def _chainages_overlap(self, from1: float, to1: float, from2: float, to2: float) -> bool:
-        """Check if two chainage ranges overlap"""
-        return not (to1 < from2 or to2 < from1)
+    def _overlapping_pairs(self, chain_from: np.ndarray,
+                           chain_to: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find every pair of overlapping chainages within a group of works
+        
+        Returns:
+            Arrays (first, second) of positions within the group, with first < second
+        """
+        if (chain_from > chain_to).any():
+            # Reversed chainages break the sweep below, so compare every pair instead
+            overlaps = self._chainages_overlap(chain_from[:, None], chain_to[:, None],
+                                               chain_from[None, :], chain_to[None, :])
+            return np.nonzero(np.triu(overlaps, k=1))
+        
+        # Sorted by start, a work overlaps every later work that starts before it ends
+        order = np.argsort(chain_from, kind='stable')
+        starts = chain_from[order]
+        ends = np.searchsorted(starts, chain_to[order], side='right')
+        counts = ends - np.arange(len(order)) - 1
+        
+        first = np.repeat(np.arange(len(order)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        first, second = order[first], order[first + 1 + offsets]
+        
+        return np.minimum(first, second), np.maximum(first, second)
     
-    def _extract_road_number(self, work_name: str) -> str:
-        """Extract road number from work name (SH-XX, MDR-XX, NH-XX)"""
-        patterns = [
-            r'SH-?\s*(\d+)',
-            r'MDR-?\s*(\d+)',
-            r'NH-?\s*(\d+)',
-            r'SH\s*(\d+)',
-            r'MDR\s*(\d+)',
-            r'NH\s*(\d+)'
-        ]
+    def _chainages_overlap(self, from1: Any, to1: Any, from2: Any, to2: Any) -> Any:
+        """Check if two chainage ranges overlap (element-wise for arrays)"""
+        return np.logical_not((to1 < from2) | (to2 < from1))
+    
+    def _road_number_column(self, names: pd.Series) -> pd.Series:
+        """Extract road numbers (SH-XX, MDR-XX, NH-XX) for every work name at once"""
+        road_numbers = pd.Series(None, index=names.index, dtype=object)
         
-        for pattern in patterns:
-            match = re.search(pattern, work_name, re.IGNORECASE)
-            if match:
-                road_type = pattern.split('(')[0].replace('-?', '').replace('\\s*', '').strip()
-                return f"{road_type}{match.group(1)}"
+        # Earlier road types take precedence: SH, then MDR, then NH
+        for road_type, pattern in self.ROAD_NUMBER_PATTERNS:
+            digits = names.str.extract(pattern, expand=False)
+            road_numbers = road_numbers.fillna(road_type + digits)
         
-        return None
+        return road_numbers
     
     def _calculate_summary(self, red_flagged: List[Dict]) -> Dict[str, Any]:
         """Calculate summary statistics of red flags"""
+        flags = [flag for record in red_flagged for flag in record['flags']]
+        
+        # Counter keeps flag types in order of first appearance
         summary = {
             'total_red_flags': len(red_flagged),
-            'by_flag_type': {},
+            'by_flag_type': dict(Counter(flag['flag_name'] for flag in flags)),
             'by_severity': {'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
         }
         
-        for record in red_flagged:
-            for flag in record['flags']:
-                flag_name = flag['flag_name']
-                severity = flag.get('severity', 'MEDIUM')
-                
-                summary['by_flag_type'][flag_name] = summary['by_flag_type'].get(flag_name, 0) + 1
-                summary['by_severity'][severity] += 1
+        for severity, count in Counter(flag.get('severity', 'MEDIUM') for flag in flags).items():
+            summary['by_severity'][severity] += count
         
         return summary
     
     # Utility methods
-    def _safe_float(self, value: Any) -> float:
-        """Safely convert value to float"""
-        try:
-            if pd.isna(value) or value == '':
-                return 0.0
-            return float(value)
-        except (ValueError, TypeError):
-            return 0.0
-    
-    def _safe_int(self, value: Any) -> int:
-        """Safely convert value to int"""
-        try:
-            if pd.isna(value) or value == '':
-                return 0
-            return int(float(value))
-        except (ValueError, TypeError):
-            return 0
+    def _numeric_column(self, df: pd.DataFrame, column: str) -> pd.Series:
+        """Coerce a whole column to float, treating missing/invalid values as 0"""
+        if column not in df.columns:
+            return pd.Series(0.0, index=df.index)
+        return pd.to_numeric(df[column], errors='coerce').fillna(0).astype(float)
     
-    def _parse_date(self, date_value: Any) -> pd.Timestamp:
-        """Parse date from various formats"""
-        try:
-            if pd.isna(date_value):
-                return None
-            return pd.to_datetime(date_value, errors='coerce')
-        except Exception:
-            return None
+    def _date_column(self, df: pd.DataFrame, column: str) -> pd.Series:
+        """Coerce a whole column to datetime, treating invalid values as NaT"""
+        if column not in df.columns:
+            return pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+        return pd.to_datetime(df[column], errors='coerce')
@@ -3,223 +3,66 @@ Report Generator for Red Flag Analysis
 Generates comprehensive reports in multiple formats
 """
 
-import pandas as pd
+import numpy as np
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Tuple, Any
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+try:
+    import xlsxwriter
+except ImportError:  # Fall back to openpyxl's write-only mode
+    xlsxwriter = None
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
 
 logger = logging.getLogger(__name__)
 
+# Rows are flushed as they are written; cell text is stored verbatim
+XLSXWRITER_OPTIONS = {'constant_memory': True, 'strings_to_formulas': False, 'strings_to_urls': False}
 
-class ReportGenerator:
-    """
-    Generates comprehensive analysis reports
-    """
-    
-    def __init__(self):
-        self.report_data = None
-        
-    def generate_report(self, analysis_results: Dict[str, Any], 
-                       output_format: str = 'excel') -> str:
-        """
-        Generate comprehensive report
-        
-        Args:
-            analysis_results: Results from RedFlagAnalyzer
-            output_format: 'excel', 'html', or 'json'
-            
-        Returns:
-            Path to generated report file
-        """
-        self.report_data = analysis_results
-        
-        if output_format == 'excel':
-            return self._generate_excel_report()
-        elif output_format == 'html':
-            return self._generate_html_report()
-        elif output_format == 'json':
-            return self._generate_json_report()
-        else:
-            raise ValueError(f"Unsupported output format: {output_format}")
-    
-    def _generate_excel_report(self) -> str:
-        """Generate Excel report with multiple sheets"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = f'/home/claude/Red_Flag_Analysis_Report_{timestamp}.xlsx'
-        
-        logger.info(f"Generating Excel report: {output_file}")
-        
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            # Sheet 1: Summary
-            summary_df = self._create_summary_dataframe()
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
-            
-            # Sheet 2: Red Flagged Entries
-            if self.report_data['red_flagged']:
-                red_flag_df = self._create_red_flag_dataframe()
-                red_flag_df.to_excel(writer, sheet_name='Red Flagged Entries', index=False)
-            
-            # Sheet 3: Green Flagged Entries
-            if self.report_data['green_flagged']:
-                green_flag_df = self._create_green_flag_dataframe()
-                green_flag_df.to_excel(writer, sheet_name='Green Flagged Entries', index=False)
-            
-            # Sheet 4: Flag Type Summary
-            flag_summary_df = self._create_flag_summary_dataframe()
-            if not flag_summary_df.empty:
-                flag_summary_df.to_excel(writer, sheet_name='Flag Type Summary', index=False)
-            
-            # Sheet 5: Detailed Findings
-            if self.report_data['red_flagged']:
-                detailed_df = self._create_detailed_findings_dataframe()
-                detailed_df.to_excel(writer, sheet_name='Detailed Findings', index=False)
-        
-        logger.info(f"Excel report generated successfully")
-        return output_file
-    
-    def _create_summary_dataframe(self) -> pd.DataFrame:
-        """Create summary statistics dataframe"""
-        summary = self.report_data.get('flag_summary', {})
-        
-        data = {
-            'Metric': [
-                'Total Records Analyzed',
-                'Red Flagged Entries',
-                'Green Flagged Entries',
-                'High Severity Flags',
-                'Medium Severity Flags',
-                'Low Severity Flags',
-                'Analysis Date'
-            ],
-            'Value': [
-                self.report_data.get('total_records', 0),
-                len(self.report_data.get('red_flagged', [])),
-                len(self.report_data.get('green_flagged', [])),
-                summary.get('by_severity', {}).get('HIGH', 0),
-                summary.get('by_severity', {}).get('MEDIUM', 0),
-                summary.get('by_severity', {}).get('LOW', 0),
-                self.report_data.get('timestamp', 'N/A')
-            ]
-        }
-        
-        return pd.DataFrame(data)
-    
-    def _create_red_flag_dataframe(self) -> pd.DataFrame:
-        """Create dataframe of red flagged entries"""
-        red_flagged = self.report_data.get('red_flagged', [])
-        
-        if not red_flagged:
-            return pd.DataFrame()
-        
-        rows = []
-        for entry in red_flagged:
-            flag_names = ', '.join([f['flag_name'] for f in entry['flags']])
-            severities = ', '.join([f.get('severity', 'N/A') for f in entry['flags']])
-            descriptions = ' | '.join([f['description'] for f in entry['flags']])
-            
-            rows.append({
-                'Excel Row No.': entry['record_index'],
-                'Sr. No.': entry['sr_no'],
-                'Budget Item No.': entry['budget_item_no'],
-                'Name of Work': entry['name_of_work'],
-                'Number of Flags': len(entry['flags']),
-                'Flag Types': flag_names,
-                'Severity': severities,
-                'Issues Found': descriptions
-            })
-        
-        return pd.DataFrame(rows)
-    
-    def _create_green_flag_dataframe(self) -> pd.DataFrame:
-        """Create dataframe of green flagged entries"""
-        green_flagged = self.report_data.get('green_flagged', [])
-        
-        if not green_flagged:
-            return pd.DataFrame()
-        
-        rows = []
-        for entry in green_flagged:
-            rows.append({
-                'Excel Row No.': entry['record_index'],
-                'Sr. No.': entry['sr_no'],
-                'Budget Item No.': entry['budget_item_no'],
-                'Name of Work': entry['name_of_work'],
-                'Status': 'No Issues Found'
-            })
-        
-        return pd.DataFrame(rows)
-    
-    def _create_flag_summary_dataframe(self) -> pd.DataFrame:
-        """Create flag type summary dataframe"""
-        summary = self.report_data.get('flag_summary', {})
-        by_flag_type = summary.get('by_flag_type', {})
-        
-        if not by_flag_type:
-            return pd.DataFrame()
-        
-        rows = []
-        for flag_type, count in by_flag_type.items():
-            rows.append({
-                'Flag Type': flag_type,
-                'Occurrences': count,
-                'Percentage': round(count / summary.get('total_red_flags', 1) * 100, 2)
-            })
-        
-        df = pd.DataFrame(rows)
-        return df.sort_values('Occurrences', ascending=False)
-    
-    def _create_detailed_findings_dataframe(self) -> pd.DataFrame:
-        """Create detailed findings dataframe"""
-        red_flagged = self.report_data.get('red_flagged', [])
-        
-        if not red_flagged:
-            return pd.DataFrame()
-        
-        rows = []
-        for entry in red_flagged:
-            for flag in entry['flags']:
-                row_data = {
-                    'Excel Row No.': entry['record_index'],
-                    'Budget Item No.': entry['budget_item_no'],
-                    'Name of Work': entry['name_of_work'],
-                    'Flag ID': flag['flag_id'],
-                    'Flag Type': flag['flag_name'],
-                    'Severity': flag.get('severity', 'N/A'),
-                    'Description': flag['description']
-                }
-                
-                # Add flag-specific details
-                details = flag.get('details', {})
-                for key, value in details.items():
-                    row_data[key.replace('_', ' ').title()] = value
-                
-                rows.append(row_data)
-        
-        return pd.DataFrame(rows)
-    
-    def _generate_html_report(self) -> str:
-        """Generate HTML report"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = f'/home/claude/Red_Flag_Analysis_Report_{timestamp}.html'
-        
-        logger.info(f"Generating HTML report: {output_file}")
-        
-        html_content = self._create_html_content()
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        logger.info("HTML report generated successfully")
-        return output_file
-    
-    def _create_html_content(self) -> str:
-        """Create HTML report content"""
-        red_count = len(self.report_data.get('red_flagged', []))
-        green_count = len(self.report_data.get('green_flagged', []))
-        total = self.report_data.get('total_records', 0)
-        
-        html = f"""
+# Header cell style used by DataFrame.to_excel
+HEADER_STYLE = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+
+SUMMARY_COLUMNS = ['Metric', 'Value']
+
+FLAG_SUMMARY_COLUMNS = ['Flag Type', 'Occurrences', 'Percentage']
+
+RED_FLAG_COLUMNS = [
+    'Excel Row No.', 'Sr. No.', 'Budget Item No.', 'Name of Work',
+    'Number of Flags', 'Flag Types', 'Severity', 'Issues Found'
+]
+
+GREEN_FLAG_COLUMNS = [
+    'Excel Row No.', 'Sr. No.', 'Budget Item No.', 'Name of Work', 'Status'
+]
+
+# Flag-specific detail columns follow these in the Detailed Findings sheet
+DETAILED_FINDINGS_COLUMNS = [
+    'Excel Row No.', 'Budget Item No.', 'Name of Work',
+    'Flag ID', 'Flag Type', 'Severity', 'Description'
+]
+
+# Column headers of flag detail keys, shared across reports
+_TITLE_CACHE = {}
+
+# One red flag table row in the HTML report
+ROW_TMPL = (
+    '<tr><td>{row}</td><td>{budget_item}</td><td>{name}...</td><td>{flag}</td>'
+    '<td><span class="severity-{severity_class}">{severity}</span></td><td>{description}</td></tr>'
+)
+
+# Static <head> and stylesheet of the HTML report
+_HTML_HEAD = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -227,178 +70,457 @@ class ReportGenerator:
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Red Flag Analysis Report</title>
     <style>
-        * {{
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             line-height: 1.6;
             background: #f5f5f5;
             color: #333;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 1200px;
             margin: 0 auto;
             padding: 20px;
-        }}
+        }
         
-        header {{
+        header {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 30px 20px;
             border-radius: 10px;
             margin-bottom: 30px;
             box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }}
+        }
         
-        header h1 {{
+        header h1 {
             font-size: 2.5em;
             margin-bottom: 10px;
-        }}
+        }
         
-        header p {{
+        header p {
             font-size: 1.1em;
             opacity: 0.9;
-        }}
+        }
         
-        .summary-cards {{
+        .summary-cards {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
             gap: 20px;
             margin-bottom: 30px;
-        }}
+        }
         
-        .card {{
+        .card {
             background: white;
             padding: 25px;
             border-radius: 10px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
             transition: transform 0.3s ease;
-        }}
+        }
         
-        .card:hover {{
+        .card:hover {
             transform: translateY(-5px);
             box-shadow: 0 4px 15px rgba(0,0,0,0.15);
-        }}
+        }
         
-        .card h3 {{
+        .card h3 {
             color: #667eea;
             margin-bottom: 10px;
             font-size: 0.9em;
             text-transform: uppercase;
             letter-spacing: 1px;
-        }}
+        }
         
-        .card .value {{
+        .card .value {
             font-size: 2.5em;
             font-weight: bold;
             color: #333;
-        }}
+        }
         
-        .card.red {{
+        .card.red {
             border-left: 4px solid #e74c3c;
-        }}
+        }
         
-        .card.green {{
+        .card.green {
             border-left: 4px solid #2ecc71;
-        }}
+        }
         
-        .card.total {{
+        .card.total {
             border-left: 4px solid #3498db;
-        }}
+        }
         
-        section {{
+        section {
             background: white;
             padding: 30px;
             border-radius: 10px;
             margin-bottom: 30px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
+        }
         
-        section h2 {{
+        section h2 {
             color: #667eea;
             margin-bottom: 20px;
             padding-bottom: 10px;
             border-bottom: 2px solid #f0f0f0;
-        }}
+        }
         
-        table {{
+        table {
             width: 100%;
             border-collapse: collapse;
             margin-top: 20px;
-        }}
+        }
         
-        th {{
+        th {
             background: #667eea;
             color: white;
             padding: 12px;
             text-align: left;
             font-weight: 600;
-        }}
+        }
         
-        td {{
+        td {
             padding: 12px;
             border-bottom: 1px solid #f0f0f0;
-        }}
+        }
         
-        tr:hover {{
+        tr:hover {
             background: #f9f9f9;
-        }}
+        }
         
-        .severity-high {{
+        .severity-high {
             background: #e74c3c;
             color: white;
             padding: 4px 12px;
             border-radius: 20px;
             font-size: 0.85em;
             font-weight: bold;
-        }}
+        }
         
-        .severity-medium {{
+        .severity-medium {
             background: #f39c12;
             color: white;
             padding: 4px 12px;
             border-radius: 20px;
             font-size: 0.85em;
             font-weight: bold;
-        }}
+        }
         
-        .severity-low {{
+        .severity-low {
             background: #95a5a6;
             color: white;
             padding: 4px 12px;
             border-radius: 20px;
             font-size: 0.85em;
             font-weight: bold;
-        }}
+        }
         
-        .footer {{
+        .footer {
             text-align: center;
             margin-top: 40px;
             padding: 20px;
             color: #777;
             font-size: 0.9em;
-        }}
+        }
         
-        @media print {{
-            body {{
+        @media print {
+            body {
                 background: white;
-            }}
-            .card {{
+            }
+            .card {
                 break-inside: avoid;
-            }}
-        }}
+            }
+        }
     </style>
 </head>
-<body>
+"""
+
+# Static footer closing the HTML report
+_HTML_FOOTER = """        <div class="footer">
+            <p>This report was automatically generated by the PWD Red Flag Analysis System</p>
+            <p>For queries, contact the relevant audit department</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+
+class ReportGenerator:
+    """
+    Generates comprehensive analysis reports
+    """
+    
+    def __init__(self):
+        self.report_data = None
+        self._timestamp = None
+        
+    def generate_report(self, analysis_results: Dict[str, Any], 
+                       output_format: str = 'excel') -> str:
+        """
+        Generate comprehensive report
+        
+        Args:
+            analysis_results: Results from RedFlagAnalyzer
+            output_format: 'excel', 'html', or 'json'
+            
+        Returns:
+            Path to generated report file
+        """
+        self.report_data = analysis_results
+        self._timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
+        if output_format not in self._DISPATCH:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        
+        return self._DISPATCH[output_format](self)
+    
+    def generate_reports(self, analysis_results: Dict[str, Any],
+                         output_formats: List[str]) -> Dict[str, str]:
+        """
+        Generate several report formats concurrently
+        
+        Each format writes its own file from the shared, read-only results,
+        so the file writes overlap in worker threads.
+        
+        Args:
+            analysis_results: Results from RedFlagAnalyzer
+            output_formats: Any of 'excel', 'html', 'json'
+            
+        Returns:
+            Dictionary mapping each format to its generated report file
+        """
+        for output_format in output_formats:
+            if output_format not in self._DISPATCH:
+                raise ValueError(f"Unsupported output format: {output_format}")
+        
+        self.report_data = analysis_results
+        # One timestamp so every format of the bundle shares a file name
+        self._timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
+        if not output_formats:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=len(output_formats)) as executor:
+            futures = {
+                output_format: executor.submit(self._DISPATCH[output_format], self)
+                for output_format in output_formats
+            }
+            return {output_format: future.result() for output_format, future in futures.items()}
+    
+    def _generate_excel_report(self) -> str:
+        """Generate Excel report with multiple sheets"""
+        output_file = f'/home/claude/Red_Flag_Analysis_Report_{self._timestamp}.xlsx'
+        
+        logger.info(f"Generating Excel report: {output_file}")
+        
+        red_flagged = self.report_data['red_flagged']
+        sheets = []
+        
+        # Sheet 1: Summary
+        sheets.append(('Summary', SUMMARY_COLUMNS, self._summary_rows()))
+        
+        # Sheet 2: Red Flagged Entries
+        if red_flagged:
+            sheets.append(('Red Flagged Entries', RED_FLAG_COLUMNS, self._iter_red_flag_rows()))
+        
+        # Sheet 3: Green Flagged Entries
+        if self.report_data['green_flagged']:
+            sheets.append(('Green Flagged Entries', GREEN_FLAG_COLUMNS, self._iter_green_flag_rows()))
+        
+        # Sheet 4: Flag Type Summary
+        flag_summary_rows = self._flag_summary_rows()
+        if flag_summary_rows:
+            sheets.append(('Flag Type Summary', FLAG_SUMMARY_COLUMNS, flag_summary_rows))
+        
+        # Sheet 5: Detailed Findings
+        if red_flagged:
+            detail_titles = self._detail_titles()
+            sheets.append(('Detailed Findings', DETAILED_FINDINGS_COLUMNS + detail_titles,
+                           self._iter_detailed_findings_rows(detail_titles)))
+        
+        if xlsxwriter is not None:
+            self._write_xlsxwriter_workbook(output_file, sheets)
+        else:
+            self._write_openpyxl_workbook(output_file, sheets)
+        
+        logger.info(f"Excel report generated successfully")
+        return output_file
+    
+    def _write_xlsxwriter_workbook(self, output_file: str, sheets: List[Tuple]) -> None:
+        """Stream (sheet name, header, rows) tables to a constant-memory xlsxwriter workbook"""
+        workbook = xlsxwriter.Workbook(output_file, XLSXWRITER_OPTIONS)
+        try:
+            header_format = workbook.add_format(HEADER_STYLE)
+            for sheet_name, header, rows in sheets:
+                worksheet = workbook.add_worksheet(sheet_name)
+                worksheet.write_row(0, 0, header, header_format)
+                for row_num, row in enumerate(rows, start=1):
+                    worksheet.write_row(row_num, 0, [_excel_value(value) for value in row])
+        finally:
+            workbook.close()
+    
+    def _write_openpyxl_workbook(self, output_file: str, sheets: List[Tuple]) -> None:
+        """Stream (sheet name, header, rows) tables to a write-only openpyxl workbook"""
+        workbook = Workbook(write_only=True)
+        side = Side(style='thin')
+        header_font = Font(bold=True)
+        header_border = Border(left=side, right=side, top=side, bottom=side)
+        header_alignment = Alignment(horizontal='center', vertical='top')
+        
+        for sheet_name, header, rows in sheets:
+            worksheet = workbook.create_sheet(sheet_name)
+            header_cells = []
+            for title in header:
+                cell = WriteOnlyCell(worksheet, value=title)
+                cell.font = header_font
+                cell.border = header_border
+                cell.alignment = header_alignment
+                header_cells.append(cell)
+            worksheet.append(header_cells)
+            for row in rows:
+                worksheet.append([_excel_value(value) for value in row])
+        
+        workbook.save(output_file)
+    
+    def _summary_rows(self) -> List[Tuple]:
+        """Create summary statistics rows, in SUMMARY_COLUMNS order"""
+        report_data = self.report_data
+        summary = report_data.get('flag_summary', {})
+        by_severity = summary.get('by_severity', {})
+        
+        return [
+            ('Total Records Analyzed', report_data.get('total_records', 0)),
+            ('Red Flagged Entries', len(report_data.get('red_flagged', []))),
+            ('Green Flagged Entries', len(report_data.get('green_flagged', []))),
+            ('High Severity Flags', by_severity.get('HIGH', 0)),
+            ('Medium Severity Flags', by_severity.get('MEDIUM', 0)),
+            ('Low Severity Flags', by_severity.get('LOW', 0)),
+            ('Analysis Date', report_data.get('timestamp', 'N/A'))
+        ]
+    
+    def _iter_red_flag_rows(self):
+        """Yield one row tuple per red flagged entry, in RED_FLAG_COLUMNS order"""
+        for entry in self.report_data.get('red_flagged', []):
+            flags = entry['flags']
+            names, severities, descriptions = [], [], []
+            for flag in flags:
+                names.append(flag['flag_name'])
+                severities.append(flag.get('severity', 'N/A'))
+                descriptions.append(flag['description'])
+            
+            yield (
+                entry['record_index'],
+                entry['sr_no'],
+                entry['budget_item_no'],
+                entry['name_of_work'],
+                len(flags),
+                ', '.join(names),
+                ', '.join(severities),
+                ' | '.join(descriptions)
+            )
+    
+    def _iter_green_flag_rows(self):
+        """Yield one row tuple per green flagged entry, in GREEN_FLAG_COLUMNS order"""
+        for entry in self.report_data.get('green_flagged', []):
+            yield (
+                entry['record_index'],
+                entry['sr_no'],
+                entry['budget_item_no'],
+                entry['name_of_work'],
+                'No Issues Found'
+            )
+    
+    def _flag_summary_rows(self) -> List[Tuple]:
+        """Create flag type summary rows, in FLAG_SUMMARY_COLUMNS order"""
+        summary = self.report_data.get('flag_summary', {})
+        by_flag_type = summary.get('by_flag_type', {})
+        
+        if not by_flag_type:
+            return []
+        
+        flag_types = np.array(list(by_flag_type), dtype=object)
+        counts = np.fromiter(by_flag_type.values(), dtype=np.int64, count=len(by_flag_type))
+        percentages = np.round(counts / summary.get('total_red_flags', 1) * 100, 2)
+        
+        # Most frequent first; ties keep their original order
+        order = np.argsort(-counts, kind='stable')
+        
+        return list(zip(
+            flag_types[order].tolist(),
+            counts[order].tolist(),
+            percentages[order].tolist()
+        ))
+    
+    def _detail_titles(self) -> List[str]:
+        """Title-cased flag detail keys, in order of first appearance"""
+        titles = {}
+        for entry in self.report_data.get('red_flagged', []):
+            for flag in entry['flags']:
+                for key in flag.get('details', {}):
+                    titles.setdefault(_title(key), None)
+        
+        return list(titles)
+    
+    def _iter_detailed_findings_rows(self, detail_titles: List[str]):
+        """Yield one row tuple per (entry, flag) pair, with detail values under detail_titles"""
+        positions = {title: i for i, title in enumerate(detail_titles)}
+        no_details = [None] * len(detail_titles)
+        
+        for entry in self.report_data.get('red_flagged', []):
+            for flag in entry['flags']:
+                # Add flag-specific details; cross-record flags carry none
+                flag_details = flag.get('details')
+                if flag_details:
+                    details = no_details.copy()
+                    for key, value in flag_details.items():
+                        details[positions[_title(key)]] = value
+                else:
+                    details = no_details
+                
+                yield (
+                    entry['record_index'],
+                    entry['budget_item_no'],
+                    entry['name_of_work'],
+                    flag['flag_id'],
+                    flag['flag_name'],
+                    flag.get('severity', 'N/A'),
+                    flag['description'],
+                    *details
+                )
+    
+    def _generate_html_report(self) -> str:
+        """Generate HTML report"""
+        output_file = f'/home/claude/Red_Flag_Analysis_Report_{self._timestamp}.html'
+        
+        logger.info(f"Generating HTML report: {output_file}")
+        
+        with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            self._write_html_content(f)
+        
+        logger.info("HTML report generated successfully")
+        return output_file
+    
+    def _write_html_content(self, f) -> None:
+        """Write HTML report content to an open text file, section by section"""
+        report_data = self.report_data
+        red_count = len(report_data.get('red_flagged', []))
+        green_count = len(report_data.get('green_flagged', []))
+        total = report_data.get('total_records', 0)
+        generated_on = report_data.get('timestamp', 'N/A')
+        red_pct = round(red_count / total * 100, 1) if total > 0 else 0
+        green_pct = round(green_count / total * 100, 1) if total > 0 else 0
+        
+        f.write(_HTML_HEAD)
+        f.write(f"""<body>
     <div class="container">
         <header>
             <h1>🚩 PWD Works Red Flag Analysis Report</h1>
-            <p>Generated on: {self.report_data.get('timestamp', 'N/A')}</p>
+            <p>Generated on: {generated_on}</p>
         </header>
         
         <div class="summary-cards">
@@ -410,53 +532,36 @@ class ReportGenerator:
             <div class="card red">
                 <h3>Red Flagged</h3>
                 <div class="value">{red_count}</div>
-                <p style="margin-top: 10px; color: #666;">{round(red_count/total*100, 1) if total > 0 else 0}% of total</p>
+                <p style="margin-top: 10px; color: #666;">{red_pct}% of total</p>
             </div>
             
             <div class="card green">
                 <h3>Green Flagged</h3>
                 <div class="value">{green_count}</div>
-                <p style="margin-top: 10px; color: #666;">{round(green_count/total*100, 1) if total > 0 else 0}% of total</p>
+                <p style="margin-top: 10px; color: #666;">{green_pct}% of total</p>
             </div>
         </div>
         
-        {self._generate_red_flag_section()}
+        """)
+        self._write_red_flag_section(f)
+        f.write("""
         
-        {self._generate_flag_summary_section()}
+        """)
+        self._write_flag_summary_section(f)
+        f.write("""
         
-        <div class="footer">
-            <p>This report was automatically generated by the PWD Red Flag Analysis System</p>
-            <p>For queries, contact the relevant audit department</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
-        return html
+""")
+        f.write(_HTML_FOOTER)
     
-    def _generate_red_flag_section(self) -> str:
-        """Generate red flag entries section for HTML"""
+    def _write_red_flag_section(self, f) -> None:
+        """Write red flag entries section for HTML"""
         red_flagged = self.report_data.get('red_flagged', [])
         
         if not red_flagged:
-            return '<section><h2>Red Flagged Entries</h2><p>No red flags detected!</p></section>'
+            f.write('<section><h2>Red Flagged Entries</h2><p>No red flags detected!</p></section>')
+            return
         
-        rows = []
-        for entry in red_flagged:
-            for flag in entry['flags']:
-                severity_class = f"severity-{flag.get('severity', 'medium').lower()}"
-                rows.append(f"""
-                <tr>
-                    <td>{entry['record_index']}</td>
-                    <td>{entry['budget_item_no']}</td>
-                    <td>{entry['name_of_work'][:100]}...</td>
-                    <td>{flag['flag_name']}</td>
-                    <td><span class="{severity_class}">{flag.get('severity', 'N/A')}</span></td>
-                    <td>{flag['description']}</td>
-                </tr>
-                """)
-        
-        return f"""
+        f.write(f"""
         <section>
             <h2>🚨 Red Flagged Entries ({len(red_flagged)} entries)</h2>
             <table>
@@ -471,32 +576,41 @@ class ReportGenerator:
                     </tr>
                 </thead>
                 <tbody>
-                    {''.join(rows)}
+                    """)
+        f.writelines(self._iter_red_flag_html_rows(red_flagged))
+        f.write("""
                 </tbody>
             </table>
         </section>
-        """
+        """)
     
-    def _generate_flag_summary_section(self) -> str:
-        """Generate flag summary section for HTML"""
+    def _iter_red_flag_html_rows(self, red_flagged: List[Dict]):
+        """Yield one rendered ROW_TMPL table row per (entry, flag) pair"""
+        for entry in red_flagged:
+            row = entry['record_index']
+            budget_item = escape(str(entry['budget_item_no']))
+            name = escape(entry['name_of_work'][:100])
+            for flag in entry['flags']:
+                severity = flag.get('severity')
+                yield ROW_TMPL.format_map({
+                    'row': row,
+                    'budget_item': budget_item,
+                    'name': name,
+                    'flag': escape(flag['flag_name']),
+                    'severity': 'N/A' if severity is None else severity,
+                    'severity_class': 'medium' if severity is None else severity.lower(),
+                    'description': escape(flag['description'])
+                })
+    
+    def _write_flag_summary_section(self, f) -> None:
+        """Write flag summary section for HTML"""
         summary = self.report_data.get('flag_summary', {})
         by_flag_type = summary.get('by_flag_type', {})
         
         if not by_flag_type:
-            return ''
-        
-        rows = []
-        for flag_type, count in sorted(by_flag_type.items(), key=lambda x: x[1], reverse=True):
-            percentage = round(count / summary.get('total_red_flags', 1) * 100, 2)
-            rows.append(f"""
-            <tr>
-                <td>{flag_type}</td>
-                <td>{count}</td>
-                <td>{percentage}%</td>
-            </tr>
-            """)
+            return
         
-        return f"""
+        f.write("""
         <section>
             <h2>📊 Flag Type Distribution</h2>
             <table>
@@ -508,21 +622,59 @@ class ReportGenerator:
                     </tr>
                 </thead>
                 <tbody>
-                    {''.join(rows)}
+                    """)
+        
+        total_red_flags = summary.get('total_red_flags', 1)
+        for flag_type, count in sorted(by_flag_type.items(), key=itemgetter(1), reverse=True):
+            percentage = round(count / total_red_flags * 100, 2)
+            f.write(f"""
+            <tr>
+                <td>{escape(flag_type)}</td>
+                <td>{count}</td>
+                <td>{percentage}%</td>
+            </tr>
+            """)
+        
+        f.write("""
                 </tbody>
             </table>
         </section>
-        """
+        """)
     
     def _generate_json_report(self) -> str:
         """Generate JSON report"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = f'/home/claude/Red_Flag_Analysis_Report_{timestamp}.json'
+        output_file = f'/home/claude/Red_Flag_Analysis_Report_{self._timestamp}.json'
         
         logger.info(f"Generating JSON report: {output_file}")
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.report_data, f, indent=2, ensure_ascii=False, default=str)
+        if orjson is not None:
+            # Datetimes pass through to default=str so they render as json.dump did
+            options = (orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                       | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME)
+            with open(output_file, 'wb') as f:
+                f.write(orjson.dumps(self.report_data, default=str, option=options))
+        else:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(self.report_data, f, indent=2, ensure_ascii=False, default=str)
         
         logger.info("JSON report generated successfully")
         return output_file
+    
+    _DISPATCH = {
+        'excel': _generate_excel_report,
+        'html': _generate_html_report,
+        'json': _generate_json_report
+    }
+
+
+def _excel_value(value: Any) -> Any:
+    """Write NaN as an empty cell, as DataFrame.to_excel does"""
+    return None if isinstance(value, float) and value != value else value
+
+
+def _title(key: str) -> str:
+    """Title-case a flag detail key for use as a column header"""
+    title = _TITLE_CACHE.get(key)
+    if title is None:
+        title = _TITLE_CACHE[key] = key.replace('_', ' ').title()
+    return title
@@ -4,10 +4,20 @@ Demonstrates how to use the system and validates functionality
 """
 
 import sys
+import re
+import zipfile
 import pandas as pd
 from datetime import datetime, timedelta
 import os
 
+try:
+    from pyexcelerate import Workbook
+except ImportError:  # Fall back to DataFrame.to_excel
+    Workbook = None
+
+_SAMPLE_PATH = None
+
+
 def create_sample_excel():
     """Create a sample Excel file for testing"""
     print("Creating sample Excel file...")
@@ -64,12 +74,27 @@ def create_sample_excel():
     
     # Save to Excel
     output_file = '/home/claude/sample_pwd_works.xlsx'
-    df.to_excel(output_file, index=False)
+    if Workbook is not None:
+        wb = Workbook()
+        wb.new_sheet('Sheet1', data=[list(df.columns)] + df.values.tolist())
+        wb.save(output_file)
+    else:
+        df.to_excel(output_file, index=False)
     
     print(f"✓ Sample Excel file created: {output_file}")
     return output_file
 
 
+def get_sample_excel():
+    """Return the sample Excel file, creating it only once per test run"""
+    global _SAMPLE_PATH
+    
+    if _SAMPLE_PATH is None or not os.path.exists(_SAMPLE_PATH):
+        _SAMPLE_PATH = create_sample_excel()
+    
+    return _SAMPLE_PATH
+
+
 def test_pipeline():
     """Test the complete pipeline"""
     print("\n" + "="*80)
@@ -77,7 +102,7 @@ def test_pipeline():
     print("="*80 + "\n")
     
     # Create sample file
-    sample_file = create_sample_excel()
+    sample_file = get_sample_excel()
     
     # Import and run pipeline
     try:
@@ -145,7 +170,7 @@ def test_excel_reader():
         from excel_reader import ExcelReader
         
         # Create sample file
-        sample_file = create_sample_excel()
+        sample_file = get_sample_excel()
         
         # Test reader
         reader = ExcelReader()
@@ -169,6 +194,56 @@ def test_excel_reader():
         return False
 
 
+def create_stale_dimension_excel(source_file):
+    """Copy an Excel file with its sheet dimension reset to A1 and its last cell removed"""
+    output_file = source_file.replace('.xlsx', '_stale_dimension.xlsx')
+    
+    with zipfile.ZipFile(source_file) as src, \
+            zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            content = src.read(item.filename)
+            if item.filename == 'xl/worksheets/sheet1.xml':
+                content, dimensions = re.subn(rb'<dimension ref="[^"]*"/>',
+                                              b'<dimension ref="A1"/>', content)
+                # Drop the final cell so the last row is shorter than the header
+                content, cells = re.subn(rb'<c r="AB6"[^>]*>.*?</c>', b'', content)
+                assert dimensions == 1 and cells == 1
+            dst.writestr(item, content)
+    
+    return output_file
+
+
+def test_stale_sheet_dimension():
+    """Test that a wrong stored sheet dimension does not truncate the data"""
+    print("\n" + "="*80)
+    print("Testing Stale Sheet Dimension")
+    print("="*80 + "\n")
+    
+    try:
+        from excel_reader import ExcelReader
+        
+        sample_file = get_sample_excel()
+        stale_file = create_stale_dimension_excel(sample_file)
+        
+        expected = ExcelReader().read_excel(sample_file)
+        df = ExcelReader().read_excel(stale_file)
+        os.remove(stale_file)
+        
+        assert df.shape == expected.shape, df.shape
+        assert list(df.columns) == list(expected.columns)
+        assert df.iloc[:-1].equals(expected.iloc[:-1])
+        assert pd.isna(df.iloc[-1, -1])
+        
+        print(f"✓ Read all {len(df)} rows and {len(df.columns)} columns despite a stale dimension")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Stale sheet dimension test failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def test_analyzer():
     """Test the analyzer module"""
     print("\n" + "="*80)
@@ -180,7 +255,7 @@ def test_analyzer():
         from red_flag_analyzer import RedFlagAnalyzer
         
         # Create and read sample file
-        sample_file = create_sample_excel()
+        sample_file = get_sample_excel()
         reader = ExcelReader()
         df = reader.read_excel(sample_file)
         
@@ -205,6 +280,110 @@ def test_analyzer():
         return False
 
 
+def test_out_of_range_time_limits():
+    """Test that unrepresentable time limits are skipped instead of failing the run"""
+    print("\n" + "="*80)
+    print("Testing Out-of-Range Time Limits")
+    print("="*80 + "\n")
+    
+    try:
+        from red_flag_analyzer import RedFlagAnalyzer
+        
+        # Beyond the pd.Timedelta range, beyond int32, completing after
+        # pd.Timestamp.max, and a normal delayed work
+        df = pd.DataFrame({
+            'Name of the work': ['Work A', 'Work B', 'Work C', 'Work D', 'Work E'],
+            'Date of Work_Order': ['1/1/2020'] * 5,
+            'Original Time Limit in Days': [2e8, 3e9, 2**32 + 30, 100000, 30],
+            'Physical Progress': [10] * 5
+        })
+        
+        analyzer = RedFlagAnalyzer()
+        results = analyzer.analyze_all_flags(df)
+        
+        flagged = [(entry['record_index'], [flag['flag_id'] for flag in entry['flags']])
+                   for entry in results['red_flagged']]
+        assert flagged == [(6, [5])], flagged
+        assert len(results['green_flagged']) == 4
+        
+        print("✓ Out-of-range time limits skipped, valid delay still flagged")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Out-of-range time limit test failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_batch_flags():
+    """Test the cross-record flags: overlapping (Flag 4) and splitting (Flag 6) of works"""
+    print("\n" + "="*80)
+    print("Testing Overlapping and Splitting Flags")
+    print("="*80 + "\n")
+    
+    try:
+        from red_flag_analyzer import RedFlagAnalyzer
+        
+        # SH-56 and MDR-43 (reversed chainage) have overlapping works; MDR-44 (2022)
+        # and SH-240 (2021) have three contiguous sub-10-lakh works each; the
+        # NH-752 small works have a gap above 5 km
+        df = pd.DataFrame({
+            'Budget Item No.': [f'BI-{i:02d}' for i in range(15)],
+            'Name of the work': [
+                'Improvement to SH-56 Km 0/00 to 10/00',
+                'Bridge on MDR-43 Km 10/00 to 5/00',
+                'Widening of SH-56 Km 5/00 to 15/00',
+                'Resurfacing of SH-56 Km 20/00 to 30/00',
+                'Repairs to MDR-43 Km 3/00 to 12/00',
+                'Strengthening of SH-56 Km 12/00 to 22/00',
+                'Patch work on MDR-44 Km 4/00 to 5/00',
+                'Patch work on MDR-44 Km 0/00 to 1/00',
+                'Patch work on MDR-44 Km 2/00 to 3/00',
+                'Patch work on NH-752 Km 0/00 to 1/00',
+                'Patch work on NH-752 Km 2/00 to 3/00',
+                'Patch work on NH-752 Km 20/00 to 21/00',
+                'Drain work on SH-240 Km 0/00 to 1/00',
+                'Drain work on SH-240 Km 2/00 to 3/00',
+                'Drain work on SH-240 Km 4/00 to 5/00'
+            ],
+            'Road Category': ['SH-56', 'MDR-43', 'SH-56', 'SH-56', 'MDR-43', 'SH-56',
+                              'MDR-44', 'MDR-44', 'MDR-44', 'NH-752', 'NH-752', 'NH-752',
+                              'SH-240', 'SH-240', 'SH-240'],
+            'Chainage From': [0, 10, 5, 20, 3, 12, 4, 0, 2, 0, 2, 20, 0, 2, 4],
+            'Chainage To': [10, 5, 15, 30, 12, 22, 5, 1, 3, 1, 3, 21, 1, 3, 5],
+            'Contract Agreement Cost (Lakh)': [500, 300, 400, 450, 250, 350,
+                                               4, 5, 6, 7, 8, 9, 3, 4, 5],
+            'Date of Work_Order': ['2022-04-01'] * 12 + ['2021-06-01'] * 3
+        })
+        
+        analyzer = RedFlagAnalyzer()
+        batch_flags = analyzer.analyze_batch_flags(df)
+        
+        found = [(flag['flag_id'], flag['description'],
+                  [record['record_index'] for record in flag['affected_records']])
+                 for flag in batch_flags]
+        expected = [
+            (4, 'Works overlap on SH56', [2, 4]),
+            (4, 'Works overlap on SH56', [4, 7]),
+            (4, 'Works overlap on SH56', [5, 7]),
+            (4, 'Works overlap on MDR43', [3, 6]),
+            (6, 'Potential work splitting detected on MDR44 in year 2022', [9, 10, 8]),
+            (6, 'Potential work splitting detected on SH240 in year 2021', [14, 15, 16])
+        ]
+        assert found == expected, found
+        assert batch_flags[4]['total_cost'] == 15
+        
+        print(f"✓ Found {len(batch_flags)} cross-record flags in the expected order")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Batch flag test failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def main():
     """Run all tests"""
     print("\n" + "="*80)
@@ -213,7 +392,10 @@ def main():
     
     tests = [
         ("Excel Reader", test_excel_reader),
+        ("Stale Sheet Dimension", test_stale_sheet_dimension),
         ("Red Flag Analyzer", test_analyzer),
+        ("Out-of-Range Time Limits", test_out_of_range_time_limits),
+        ("Overlapping and Splitting Flags", test_batch_flags),
         ("Complete Pipeline", test_pipeline)
     ]
     
@@ -1,12 +1,127 @@
+import io
 import os
-import pandas as pd
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, List, Tuple, Any
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+try:
+    import xlsxwriter
+except ImportError:  # Fall back to openpyxl's write-only mode
+    xlsxwriter = None
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import (
+        SimpleDocTemplate,
+        Paragraph,
+        Spacer,
+        Table,
+        TableStyle,
+        PageBreak,
+    )
+except ImportError:  # PDF reports are unavailable without reportlab
+    SimpleDocTemplate = None
 
 logger = logging.getLogger(__name__)
 
+# Rows are flushed to temp files as they are written; cell text is stored verbatim
+XLSXWRITER_OPTIONS = {
+    "constant_memory": True,
+    "in_memory": False,
+    "strings_to_formulas": False,
+    "strings_to_urls": False,
+    "strings_to_numbers": False,
+}
+
+# Report files are written in large sequential chunks
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Larger JSON reports are encoded entry by entry
+JSON_STREAM_MIN_ENTRIES = 1000
+
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# Output directories already created by this process
+_ENSURED_DIRS = set()
+
+# Shared read-only default for flags without details
+_EMPTY = {}
+
+# Header cell style used by DataFrame.to_excel
+HEADER_STYLE = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+
+SUMMARY_COLUMNS = ["Metric", "Value"]
+
+FLAG_SUMMARY_COLUMNS = ["Flag Type", "Occurrences", "Percentage"]
+
+# Flag-specific detail columns follow these in the red flag sheets
+RED_FLAG_COLUMNS = [
+    "Excel Row No",
+    "Sr No",
+    "Budget Item No",
+    "Name of Work",
+    "Flag Type",
+    "Severity",
+    "Reason",
+]
+
+GREEN_FLAG_COLUMNS = ["Excel Row", "Sr No", "Budget Item", "Work Name", "Status"]
+
+DETAILED_FINDINGS_COLUMNS = [
+    "Excel Row",
+    "Budget Item",
+    "Work Name",
+    "Flag ID",
+    "Flag Name",
+    "Severity",
+    "Description",
+]
+
+REPORT_EXTENSIONS = {
+    "excel": ".xlsx",
+    "html": ".html",
+    "json": ".json",
+    "pdf": ".pdf",
+}
+
+# CSS braces are doubled for str.format
+HTML_TEMPLATE = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <title>Red Flag Analysis Report</title>
+            <style>
+                body {{ font-family: Arial; padding: 20px; }}
+                h1 {{ color: #d32f2f; }}
+                table {{ border-collapse: collapse; width: 100%; }}
+                th, td {{ border: 1px solid #ccc; padding: 8px; }}
+                th {{ background: #f5f5f5; }}
+            </style>
+        </head>
+        <body>
+            <h1>🚩 Red Flag Analysis Report</h1>
+            <p><b>Total Records:</b> {total}</p>
+            <p><b>Red Flagged:</b> {red}</p>
+            <p><b>Green Flagged:</b> {green}</p>
+            <p><b>Generated:</b> {timestamp}</p>
+        </body>
+        </html>
+        """
+
 
 class ReportGenerator:
     def __init__(self, output_dir: str | None = None):
@@ -21,7 +136,7 @@ class ReportGenerator:
             or "/tmp/reports"
         )
 
-        os.makedirs(self.output_dir, exist_ok=True)
+        _ensure_dir(self.output_dir)
         self.report_data = None
 
         logger.info(f"Report output directory set to: {self.output_dir}")
@@ -33,198 +148,336 @@ class ReportGenerator:
     ) -> str:
         self.report_data = analysis_results
 
-        if output_format == "excel":
-            return self._generate_excel_report()
-        elif output_format == "html":
-            return self._generate_html_report()
-        elif output_format == "json":
-            return self._generate_json_report()
-        elif output_format == "pdf":
-            return self._generate_pdf_report()
-        else:
+        if output_format not in REPORT_EXTENSIONS:
             raise ValueError(f"Unsupported output format: {output_format}")
 
-    # ------------------ EXCEL ------------------
+        output_file = self._claim_output_files([output_format])[output_format]
+        return self._write_report(output_format, output_file)
 
-    def _generate_excel_report(self) -> str:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(
-            self.output_dir, f"Red_Flag_Analysis_Report_{timestamp}.xlsx"
-        )
+    def generate_reports(
+        self,
+        analysis_results: Dict[str, Any],
+        output_formats: List[str],
+    ) -> Dict[str, str]:
+        for output_format in output_formats:
+            if output_format not in REPORT_EXTENSIONS:
+                raise ValueError(f"Unsupported output format: {output_format}")
+
+        self.report_data = analysis_results
 
+        if not output_formats:
+            return {}
+
+        # Paths are claimed up front under one base name; each format then
+        # writes its own file from the shared, read-only results
+        output_files = self._claim_output_files(output_formats)
+        with ThreadPoolExecutor(max_workers=len(output_files)) as executor:
+            futures = {
+                fmt: executor.submit(self._write_report, fmt, output_file)
+                for fmt, output_file in output_files.items()
+            }
+            return {fmt: future.result() for fmt, future in futures.items()}
+
+    def _write_report(self, output_format: str, output_file: str) -> str:
+        try:
+            if output_format == "excel":
+                return self._generate_excel_report(output_file)
+            elif output_format == "html":
+                return self._generate_html_report(output_file)
+            elif output_format == "json":
+                return self._generate_json_report(output_file)
+            else:
+                return self._generate_pdf_report(output_file)
+        except Exception:
+            # Release the claimed name rather than leave an empty report behind
+            try:
+                os.remove(output_file)
+            except OSError:
+                pass
+            raise
+
+    def _claim_output_files(self, output_formats: List[str]) -> Dict[str, str]:
+        timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+        base = os.path.join(self.output_dir, f"Red_Flag_Analysis_Report_{timestamp}")
+
+        # Names are claimed by creating the files exclusively. Every format of
+        # a bundle shares one base name, so if any of them is taken (by a run
+        # within the same second, in any process) the whole bundle moves on to
+        # the next numbered suffix
+        candidate = base
+        counter = 1
+        while True:
+            output_files = {}
+            try:
+                for fmt in dict.fromkeys(output_formats):
+                    output_file = f"{candidate}{REPORT_EXTENSIONS[fmt]}"
+                    os.close(os.open(output_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                    output_files[fmt] = output_file
+                return output_files
+            except FileExistsError:
+                for output_file in output_files.values():
+                    os.remove(output_file)
+                candidate = f"{base}_{counter}"
+                counter += 1
+
+    # ------------------ EXCEL ------------------
+
+    def _generate_excel_report(self, output_file: str) -> str:
         logger.info(f"Generating Excel report: {output_file}")
 
-        with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
-            self._create_summary_dataframe().to_excel(
-                writer, sheet_name="Summary", index=False
-            )
+        sheets = [("Summary", SUMMARY_COLUMNS, self._summary_pairs())]
+        flag_rows = None
 
-            if self.report_data.get("red_flagged"):
-                self._create_red_flag_dataframe().to_excel(
-                    writer, sheet_name="Red Flagged Entries", index=False
+        red_flagged = self.report_data.get("red_flagged")
+        if red_flagged:
+            detail_keys = self._detail_keys()
+            detail_titles = list(
+                dict.fromkeys(k.replace("_", " ").title() for k in detail_keys)
+            )
+            # Red Flagged Entries and Detailed Findings are filled together
+            # from a single pass over the flags
+            sheets.append(
+                ("Red Flagged Entries", RED_FLAG_COLUMNS + detail_titles, None)
+            )
+            flag_rows = self._iter_flag_row_pairs(detail_keys, detail_titles)
+
+        if self.report_data.get("green_flagged"):
+            sheets.append(
+                (
+                    "Green Flagged Entries",
+                    GREEN_FLAG_COLUMNS,
+                    self._iter_green_flag_rows(),
                 )
+            )
 
-            if self.report_data.get("green_flagged"):
-                self._create_green_flag_dataframe().to_excel(
-                    writer, sheet_name="Green Flagged Entries", index=False
+        # Flag types are counted from the red flags, so a report without any
+        # has no summary table to build
+        if red_flagged:
+            flag_summary_rows = self._flag_summary_rows()
+            if flag_summary_rows:
+                sheets.append(
+                    ("Flag Type Summary", FLAG_SUMMARY_COLUMNS, flag_summary_rows)
                 )
 
-            flag_summary_df = self._create_flag_summary_dataframe()
-            if not flag_summary_df.empty:
-                flag_summary_df.to_excel(
-                    writer, sheet_name="Flag Type Summary", index=False
-                )
+            sheets.append(
+                ("Detailed Findings", DETAILED_FINDINGS_COLUMNS + detail_keys, None)
+            )
 
-            if self.report_data.get("red_flagged"):
-                self._create_detailed_findings_dataframe().to_excel(
-                    writer, sheet_name="Detailed Findings", index=False
-                )
+        if xlsxwriter is not None:
+            self._write_xlsxwriter_workbook(output_file, sheets, flag_rows)
+        else:
+            self._write_openpyxl_workbook(output_file, sheets, flag_rows)
 
         return output_file
 
-    # ------------------ DATAFRAMES ------------------
+    # Sheets listed without rows are filled from paired_rows, which yields one
+    # row for each of them per step, in sheet order
 
-    def _create_summary_dataframe(self) -> pd.DataFrame:
+    def _write_xlsxwriter_workbook(
+        self, output_file: str, sheets: List[Tuple], paired_rows=None
+    ) -> None:
+        workbook = xlsxwriter.Workbook(output_file, XLSXWRITER_OPTIONS)
+        try:
+            header_format = workbook.add_format(HEADER_STYLE)
+            paired_sheets = []
+            for sheet_name, header, rows in sheets:
+                worksheet = workbook.add_worksheet(sheet_name)
+                worksheet.write_row(0, 0, header, header_format)
+                if rows is None:
+                    paired_sheets.append(worksheet)
+                    continue
+                for row_num, row in enumerate(rows, start=1):
+                    worksheet.write_row(row_num, 0, [_excel_value(v) for v in row])
+
+            if paired_rows is not None:
+                for row_num, row_group in enumerate(paired_rows, start=1):
+                    for worksheet, row in zip(paired_sheets, row_group):
+                        worksheet.write_row(
+                            row_num, 0, [_excel_value(v) for v in row]
+                        )
+        finally:
+            workbook.close()
+
+    def _write_openpyxl_workbook(
+        self, output_file: str, sheets: List[Tuple], paired_rows=None
+    ) -> None:
+        workbook = Workbook(write_only=True)
+        side = Side(style="thin")
+        header_font = Font(bold=True)
+        header_border = Border(left=side, right=side, top=side, bottom=side)
+        header_alignment = Alignment(horizontal="center", vertical="top")
+
+        paired_sheets = []
+        for sheet_name, header, rows in sheets:
+            worksheet = workbook.create_sheet(sheet_name)
+            header_cells = []
+            for title in header:
+                cell = WriteOnlyCell(worksheet, value=title)
+                cell.font = header_font
+                cell.border = header_border
+                cell.alignment = header_alignment
+                header_cells.append(cell)
+            worksheet.append(header_cells)
+            if rows is None:
+                paired_sheets.append(worksheet)
+                continue
+            for row in rows:
+                worksheet.append([_excel_value(v) for v in row])
+
+        if paired_rows is not None:
+            for row_group in paired_rows:
+                for worksheet, row in zip(paired_sheets, row_group):
+                    worksheet.append([_excel_value(v) for v in row])
+
+        workbook.save(output_file)
+
+    # ------------------ SHEET ROWS ------------------
+
+    def _summary_pairs(self):
         summary = self.report_data.get("flag_summary", {})
-        return pd.DataFrame(
-            {
-                "Metric": [
-                    "Total Records",
-                    "Red Flagged",
-                    "Green Flagged",
-                    "High Severity",
-                    "Medium Severity",
-                    "Low Severity",
-                    "Analysis Timestamp",
-                ],
-                "Value": [
-                    self.report_data.get("total_records", 0),
-                    len(self.report_data.get("red_flagged", [])),
-                    len(self.report_data.get("green_flagged", [])),
-                    summary.get("by_severity", {}).get("HIGH", 0),
-                    summary.get("by_severity", {}).get("MEDIUM", 0),
-                    summary.get("by_severity", {}).get("LOW", 0),
-                    self.report_data.get("timestamp", "N/A"),
-                ],
-            }
-        )
-
-    def _create_red_flag_dataframe(self) -> pd.DataFrame:
-        rows = []
-
+        by_severity = summary.get("by_severity", {})
+        yield "Total Records", self.report_data.get("total_records", 0)
+        yield "Red Flagged", len(self.report_data.get("red_flagged", []))
+        yield "Green Flagged", len(self.report_data.get("green_flagged", []))
+        yield "High Severity", by_severity.get("HIGH", 0)
+        yield "Medium Severity", by_severity.get("MEDIUM", 0)
+        yield "Low Severity", by_severity.get("LOW", 0)
+        yield "Analysis Timestamp", self.report_data.get("timestamp", "N/A")
+
+    def _detail_keys(self) -> List[str]:
+        # Union of flag detail keys in order of first appearance, fixing the
+        # column schema before any row is streamed
+        keys = {}
         for entry in self.report_data.get("red_flagged", []):
             for flag in entry["flags"]:
-                row = {
-                "Excel Row No": entry["record_index"],
-                "Sr No": entry["sr_no"],
-                "Budget Item No": entry["budget_item_no"],
-                "Name of Work": entry["name_of_work"],
-                "Flag Type": flag["flag_name"],
-                "Severity": flag.get("severity", "N/A"),
-                "Reason": flag["description"]
-                }
-
-                for k, v in flag.get("details", {}).items():
-                    row[k.replace("_", " ").title()] = v
-
-                rows.append(row)
-
-        return pd.DataFrame(rows)
-
+                keys.update(dict.fromkeys(flag.get("details", _EMPTY)))
+        return list(keys)
+
+    # Red Flagged Entries title-case the detail keys; Detailed Findings keep them raw
+
+    def _iter_flag_row_pairs(self, detail_keys: List[str], detail_titles: List[str]):
+        title_index = {title: i for i, title in enumerate(detail_titles)}
+        title_positions = {
+            k: title_index[k.replace("_", " ").title()] for k in detail_keys
+        }
+        key_positions = {k: i for i, k in enumerate(detail_keys)}
+        title_width = len(detail_titles)
+        key_width = len(detail_keys)
+        for entry in self.report_data.get("red_flagged", []):
+            record_index = entry["record_index"]
+            budget_item_no = entry["budget_item_no"]
+            name_of_work = entry["name_of_work"]
+            for flag in entry["flags"]:
+                details = flag.get("details", _EMPTY)
+                flag_name = flag["flag_name"]
+                severity = flag.get("severity", "N/A")
+                description = flag["description"]
+                yield (
+                    (
+                        record_index,
+                        entry["sr_no"],
+                        budget_item_no,
+                        name_of_work,
+                        flag_name,
+                        severity,
+                        description,
+                        *_fill_by_position(details, title_positions, title_width),
+                    ),
+                    (
+                        record_index,
+                        budget_item_no,
+                        name_of_work,
+                        flag["flag_id"],
+                        flag_name,
+                        severity,
+                        description,
+                        *_fill_by_position(details, key_positions, key_width),
+                    ),
+                )
 
-    def _create_green_flag_dataframe(self) -> pd.DataFrame:
-        return pd.DataFrame(
-            [
-                {
-                    "Excel Row": e["record_index"],
-                    "Sr No": e["sr_no"],
-                    "Budget Item": e["budget_item_no"],
-                    "Work Name": e["name_of_work"],
-                    "Status": "No Issues Found",
-                }
-                for e in self.report_data.get("green_flagged", [])
-            ]
-        )
+    def _iter_green_flag_rows(self):
+        for e in self.report_data.get("green_flagged", []):
+            yield (
+                e["record_index"],
+                e["sr_no"],
+                e["budget_item_no"],
+                e["name_of_work"],
+                "No Issues Found",
+            )
 
-    def _create_flag_summary_dataframe(self) -> pd.DataFrame:
+    def _flag_summary_rows(self) -> List[Tuple]:
         summary = self.report_data.get("flag_summary", {})
+        total = summary.get("total_red_flags", 1)
         rows = [
-            {
-                "Flag Type": k,
-                "Occurrences": v,
-                "Percentage": round(
-                    v / summary.get("total_red_flags", 1) * 100, 2
-                ),
-            }
+            (k, v, round(v / total * 100, 2))
             for k, v in summary.get("by_flag_type", {}).items()
         ]
-        return pd.DataFrame(rows).sort_values("Occurrences", ascending=False)
-
-    def _create_detailed_findings_dataframe(self) -> pd.DataFrame:
-        rows = []
-        for entry in self.report_data.get("red_flagged", []):
-            for flag in entry["flags"]:
-                row = {
-                    "Excel Row": entry["record_index"],
-                    "Budget Item": entry["budget_item_no"],
-                    "Work Name": entry["name_of_work"],
-                    "Flag ID": flag["flag_id"],
-                    "Flag Name": flag["flag_name"],
-                    "Severity": flag.get("severity", "N/A"),
-                    "Description": flag["description"],
-                }
-                row.update(flag.get("details", {}))
-                rows.append(row)
-        return pd.DataFrame(rows)
+        rows.sort(key=itemgetter(1), reverse=True)
+        return rows
 
     # ------------------ HTML / JSON ------------------
 
-    def _generate_html_report(self) -> str:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(
-            self.output_dir, f"Red_Flag_Analysis_Report_{timestamp}.html"
-        )
-
-        with open(output_file, "w", encoding="utf-8") as f:
+    def _generate_html_report(self, output_file: str) -> str:
+        with open(
+            output_file, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE
+        ) as f:
             f.write(self._create_html_content())
 
         return output_file
 
-    def _generate_json_report(self) -> str:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(
-            self.output_dir, f"Red_Flag_Analysis_Report_{timestamp}.json"
-        )
-
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(self.report_data, f, indent=2, ensure_ascii=False, default=str)
+    def _generate_json_report(self, output_file: str) -> str:
+        if orjson is not None:
+            # Datetimes pass through to default=str so they render as json.dump did
+            options = (
+                orjson.OPT_INDENT_2
+                | orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_SERIALIZE_NUMPY
+                | orjson.OPT_PASSTHROUGH_DATETIME
+            )
+            red_flagged = self.report_data.get("red_flagged", [])
+            with open(output_file, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+                if len(red_flagged) > JSON_STREAM_MIN_ENTRIES:
+                    self._write_orjson_stream(f, options)
+                else:
+                    f.write(
+                        orjson.dumps(self.report_data, default=str, option=options)
+                    )
+        else:
+            with open(
+                output_file, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE
+            ) as f:
+                json.dump(
+                    self.report_data, f, indent=2, ensure_ascii=False, default=str
+                )
 
         return output_file
 
+    def _write_orjson_stream(self, f, options: int) -> None:
+        # Writes the same bytes as a single indented orjson.dumps, but encodes
+        # the record lists one entry at a time so the whole document is never
+        # held in memory. orjson escapes newlines inside strings, so every raw
+        # newline in an encoded value is indentation and can be shifted.
+        f.write(b"{")
+        for i, (key, value) in enumerate(self.report_data.items()):
+            f.write(b",\n  " if i else b"\n  ")
+            f.write(orjson.dumps(key))
+            f.write(b": ")
+            if isinstance(value, list) and value:
+                for j, item in enumerate(value):
+                    f.write(b",\n    " if j else b"[\n    ")
+                    data = orjson.dumps(item, default=str, option=options)
+                    f.write(data.replace(b"\n", b"\n    "))
+                f.write(b"\n  ]")
+            else:
+                data = orjson.dumps(value, default=str, option=options)
+                f.write(data.replace(b"\n", b"\n  "))
+        f.write(b"\n}" if self.report_data else b"}")
+
     # ------------------ PDF ------------------
 
-    def _generate_pdf_report(self) -> str:
-        try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import A4
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.platypus import (
-                SimpleDocTemplate,
-                Paragraph,
-                Spacer,
-                Table,
-                TableStyle,
-                PageBreak,
-            )
-        except ImportError as exc:
-            raise ValueError(
-                "PDF generation requires the 'reportlab' package."
-            ) from exc
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(
-            self.output_dir, f"Red_Flag_Analysis_Report_{timestamp}.pdf"
-        )
+    def _generate_pdf_report(self, output_file: str) -> str:
+        if SimpleDocTemplate is None:
+            raise ValueError("PDF generation requires the 'reportlab' package.")
 
         styles = getSampleStyleSheet()
         header_style = ParagraphStyle(
@@ -255,11 +508,12 @@ class ReportGenerator:
             Spacer(1, 12),
         ]
 
+        red_flagged = self.report_data.get("red_flagged", [])
         summary = self.report_data.get("flag_summary", {})
         summary_data = [
             ["Metric", "Value"],
             ["Total Records", self.report_data.get("total_records", 0)],
-            ["Red Flagged", len(self.report_data.get("red_flagged", []))],
+            ["Red Flagged", len(red_flagged)],
             ["Green Flagged", len(self.report_data.get("green_flagged", []))],
             ["High Severity", summary.get("by_severity", {}).get("HIGH", 0)],
             ["Medium Severity", summary.get("by_severity", {}).get("MEDIUM", 0)],
@@ -309,18 +563,18 @@ class ReportGenerator:
         red_flag_rows = [
             ["Excel Row", "Budget Item", "Work Name", "Flag", "Severity", "Reason"]
         ]
-        for entry in self.report_data.get("red_flagged", []):
-            for flag in entry.get("flags", []):
-                red_flag_rows.append(
-                    [
-                        Paragraph(str(entry.get("record_index", "")), label_style),
-                        Paragraph(str(entry.get("budget_item_no", "")), wrap_style),
-                        Paragraph(str(entry.get("name_of_work", "")), wrap_style),
-                        Paragraph(str(flag.get("flag_name", "")), wrap_style),
-                        Paragraph(str(flag.get("severity", "N/A")), label_style),
-                        Paragraph(str(flag.get("description", "")), wrap_style),
-                    ]
-                )
+        red_flag_rows += [
+            [
+                Paragraph(str(entry.get("record_index", "")), label_style),
+                Paragraph(str(entry.get("budget_item_no", "")), wrap_style),
+                Paragraph(str(entry.get("name_of_work", "")), wrap_style),
+                Paragraph(str(flag.get("flag_name", "")), wrap_style),
+                Paragraph(str(flag.get("severity", "N/A")), label_style),
+                Paragraph(str(flag.get("description", "")), wrap_style),
+            ]
+            for entry in red_flagged
+            for flag in entry.get("flags", [])
+        ]
 
         if len(red_flag_rows) > 1:
             story.append(PageBreak())
@@ -346,8 +600,12 @@ class ReportGenerator:
         else:
             story.append(Paragraph("No red flags detected.", styles["Normal"]))
 
-        doc = SimpleDocTemplate(output_file, pagesize=A4)
+        # ReportLab emits many small writes; collect them and write the file once
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4)
         doc.build(story)
+        with open(output_file, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(buffer.getbuffer())
 
         return output_file
 
@@ -356,26 +614,33 @@ class ReportGenerator:
         green = len(self.report_data.get("green_flagged", []))
         total = self.report_data.get("total_records", 0)
 
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>Red Flag Analysis Report</title>
-            <style>
-                body {{ font-family: Arial; padding: 20px; }}
-                h1 {{ color: #d32f2f; }}
-                table {{ border-collapse: collapse; width: 100%; }}
-                th, td {{ border: 1px solid #ccc; padding: 8px; }}
-                th {{ background: #f5f5f5; }}
-            </style>
-        </head>
-        <body>
-            <h1>🚩 Red Flag Analysis Report</h1>
-            <p><b>Total Records:</b> {total}</p>
-            <p><b>Red Flagged:</b> {red}</p>
-            <p><b>Green Flagged:</b> {green}</p>
-            <p><b>Generated:</b> {self.report_data.get("timestamp", "N/A")}</p>
-        </body>
-        </html>
-        """
+        return HTML_TEMPLATE.format_map(
+            {
+                "total": total,
+                "red": red,
+                "green": green,
+                "timestamp": self.report_data.get("timestamp", "N/A"),
+            }
+        )
+
+
+def _ensure_dir(path: str) -> None:
+    """Create an output directory once per process."""
+    if path not in _ENSURED_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _ENSURED_DIRS.add(path)
+
+
+def _excel_value(value: Any) -> Any:
+    """Write NaN as an empty cell, as DataFrame.to_excel does."""
+    return None if isinstance(value, float) and value != value else value
+
+
+def _fill_by_position(
+    details: Dict[str, Any], positions: Dict[str, int], width: int
+) -> List[Any]:
+    """Place flag detail values in their column slots; missing keys stay empty."""
+    values = [None] * width
+    for key, value in details.items():
+        values[positions[key]] = value
+    return values
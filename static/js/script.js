@@ -1,5 +1,8 @@
 // JavaScript for PWD Red Flag Analyzer
 
+const JOB_POLL_INTERVAL = 2000;  // ms between analysis status checks
+const JOB_MAX_WAIT = 10 * 60 * 1000;  // give up polling after 10 minutes
+
 document.addEventListener('DOMContentLoaded', function() {
     const uploadForm = document.getElementById('uploadForm');
     const fileInput = document.getElementById('fileInput');
@@ -8,6 +11,11 @@ document.addEventListener('DOMContentLoaded', function() {
     const uploadSection = document.getElementById('uploadSection');
     const resultsSection = document.getElementById('resultsSection');
 
+    // Pages without the upload form only use waitForJob
+    if (!uploadForm) {
+        return;
+    }
+
     // File input change handler
     fileInput.addEventListener('change', function(e) {
         if (e.target.files.length > 0) {
@@ -47,7 +55,12 @@ document.addEventListener('DOMContentLoaded', function() {
                 body: formData
             });
 
-            const result = await response.json();
+            let result = await response.json();
+
+            // Analysis runs as a background job; wait for it to finish
+            if (result.success && result.status_url) {
+                result = await waitForJob(result.status_url);
+            }
 
             // Hide loading
             loadingOverlay.classList.remove('active');
@@ -67,6 +80,23 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
+async function waitForJob(statusUrl) {
+    const deadline = Date.now() + JOB_MAX_WAIT;
+
+    while (Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL));
+
+        const response = await fetch(statusUrl);
+        const status = await response.json();
+
+        if (status.status !== 'running') {
+            return status;
+        }
+    }
+
+    return { success: false, error: 'Analysis is taking too long. Please try a smaller file.' };
+}
+
 function displayResults(result) {
     const uploadSection = document.getElementById('uploadSection');
     const resultsSection = document.getElementById('resultsSection');